@@ -0,0 +1,50 @@
+"""
+Compiled vs interpreted dispatch
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Times calling a matcher against calling the dispatch function returned
+by ``Matcher.compile()``.
+
+Run as ``PYTHONPATH=. python examples/bench_compile.py``.
+"""
+
+import timeit
+from typing import Any
+
+from kingston.match import TypeMatcher, ValueMatcher
+
+from stupidexpr import stupid
+
+TYPES = (int, str, float, bytes, complex)
+
+types = TypeMatcher({
+    **{t: lambda x: x
+       for t in TYPES},
+    **{(a, b): lambda x, y: y
+       for a in TYPES for b in TYPES},
+    (int, Any): lambda x, y: x,
+})
+
+values = ValueMatcher({
+    **{(n, op): lambda n, op: n
+       for n in range(100) for op in '+-*/'},
+    (Any, '%'): lambda n, op: op,
+})
+
+
+def bench(name: str, matcher: Any, *args: Any) -> None:
+    dispatch = matcher.compile()
+    interpreted = min(timeit.repeat(lambda: matcher(*args), number=100000))
+    compiled = min(timeit.repeat(lambda: dispatch(*args), number=100000))
+    print(f"{name:<24} interpreted {interpreted * 10:.2f} µs, "
+          f"compiled {compiled * 10:.2f} µs "
+          f"({interpreted / compiled:.1f}x)")
+
+
+if __name__ == '__main__':
+    bench('types, 1 argument', types, 1)
+    bench('types, 2 arguments', types, 'a', 1.0)
+    bench('types, wildcard', types, 1, [])
+    bench('values, 2 arguments', values, 42, '*')
+    bench('values, wildcard', values, 42, '%')
+    bench('nested', stupid, 1, '+', 2)
@@ -1,4 +1,5 @@
-from typing import Any, Callable, Set, Union
+from inspect import Parameter
+from typing import Any, Callable, Mapping, Set, Union
 
 PRIMTYPES: Any
 LISTLIKE: Any
@@ -16,3 +17,4 @@ isgen: Any
 def unbox(x: Any) -> Singular: ...
 def box(x: Any) -> Any: ...
 def setof(x: Any) -> Set: ...
+def params(fn: Callable) -> Mapping[str, Parameter]: ...
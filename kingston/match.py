@@ -17,19 +17,38 @@ with ValueMatcher('sum', 1, 2, 3) as m:
 """
 
 import os
+import re
+import asyncio
+import math
+import numbers
+import pickle
+import time
+from abc import abstractmethod, get_cache_token
+from bisect import bisect_left
+from decimal import Decimal
+from fnmatch import translate
+from inspect import Parameter, isawaitable, isgenerator
+from types import MethodType
+from collections import OrderedDict, Counter, abc, deque, namedtuple
+from functools import lru_cache, partial, update_wrapper
+from concurrent.futures import ProcessPoolExecutor
 
 from typing import (Any, Type, Iterable, Tuple, Mapping, Callable, Union, Set,
-                    List, Dict, Collection, Sequence, TypeVar, Generic, cast)
+                    List, Dict, Collection, Sequence, TypeVar, Generic,
+                    Optional, FrozenSet, Iterator, AsyncIterable,
+                    AsyncIterator, Deque, Pattern, cast, get_args,
+                    get_origin)
 
 import funcy as fy  # type: ignore[import]
 
 from . import lang
 from . import decl
-from .decl import box, unbox, Singular
+from .decl import box, unbox, Singular, LISTLIKE
 from . import xxx_kind as kind
 from .xxx_kind import funcnick  # type: ignore[attr-defined]
 from .xxx_kind import primparams  # type: ignore[attr-defined]
 from .xxx_kind import xrtype  # type: ignore[attr-defined]
+from .xxx_kind import Runs, xrruns  # type: ignore[attr-defined]
 
 SingularTypeCand = Type[Any]
 ComplexTypeCand = Iterable[SingularTypeCand]
@@ -48,6 +67,18 @@ class Conflict(TypeError):
     """
 
 
+class Ambiguous(Conflict):
+    """Exception raised if a type pattern overlaps another pattern
+    without being either more or less specific than it.
+
+    Only ``TypeMatcher.case()`` checks for it. Patterns given to the
+    constructor, assigned as items, added by ``update()`` or declared
+    as methods with ``@case`` are not checked; among them, ties go to
+    the first registered.
+
+    """
+
+
 class Mismatch(ValueError):
     "Exception to signal matching error in Matcher objects."
 
@@ -67,6 +98,31 @@ class NoNextAnchor:
     "Symbol signifying that no more anchor values exist in a pattern."
 
 
+class Keywords(tuple):
+    """Pattern for the keyword arguments of a call, last in a pattern.
+    Calls fit it if they have exactly these keyword arguments, each
+    fitting its own pattern (a type or value, or ``Any``).
+
+    >>> Keywords(verbose=bool, path=Any)
+    Keywords(path=typing.Any, verbose=<class 'bool'>)
+
+    """
+    def __new__(cls, **patterns: Any) -> 'Keywords':
+        return super(Keywords, cls).__new__(
+            cls, sorted(patterns.items(), key=lambda item: item[0]))
+
+    def __getnewargs_ex__(self) -> Tuple[Tuple, Dict[str, Any]]:
+        return (), dict(self)
+
+    @property
+    def names(self) -> FrozenSet[str]:
+        return frozenset(name for name, _ in self)
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={pattern!r}' for name, pattern in self)
+        return f'Keywords({fields})'
+
+
 def match(cand: Any, pattern: Any) -> bool:
     """*”Primitive”* function that checks an individual value against
     another. The ``match()`` function is *only* responsible for
@@ -74,16 +130,158 @@ def match(cand: Any, pattern: Any) -> bool:
     handled elsewhere.
 
     """
+    if isinstance(pattern, Predicate):
+        return pattern(cand)
     cand, pattern = kind.cast_to_hashable(cand), kind.cast_to_hashable(pattern)
     return cand == pattern
 
 
+SAMPLE = 16  # max elements of a sequence checked against a generic
+
+
+def subclass(cand: Any, pattern: Any) -> bool:
+    """Remembered ``issubclass()``, ``False`` if it can't tell.
+
+    Checks against ABC's with a ``__subclasshook__`` and runtime
+    checkable protocols are slow, so their verdict is remembered per
+    class, until any class is registered with an ABC (see
+    ``abc.get_cache_token()``).
+
+    """
+    return subclass_since(get_cache_token(), cand, pattern)
+
+
+@lru_cache(maxsize=4096)
+def subclass_since(token: Any, cand: Any, pattern: Any) -> bool:
+    "``subclass()`` as of the ABC registrations ``token`` stands for."
+    try:
+        return issubclass(cand, pattern)
+    except TypeError:  # not a class, can't be a subtype
+        return False
+
+
+def sampled(values: Sequence, size: int) -> Iterable:
+    "At most ``size`` evenly spread ``values``."
+    if len(values) <= size:
+        return values
+    step = (len(values) - 1) / (size - 1)
+    return (values[round(n * step)] for n in range(size))
+
+
+def match_generic(cand: Sequence, pattern: Any) -> bool:
+    """Checks if the sequence ``cand``, as described by ``xrtype()``,
+    fits a parametrised generic like ``List[int]``. Only a sample of
+    ``SAMPLE`` elements is checked, except for fixed-length tuples.
+
+    >>> match_generic([int, bool], List[int])
+    True
+    >>> match_generic((int, str), Tuple[int, str])
+    True
+    >>> match_generic([int, str], Sequence[int])
+    False
+
+    """
+    origin, params = get_origin(pattern), get_args(pattern)
+    if not subclass(type(cand), origin):
+        return False
+    elif origin is tuple and params[-1:] != (..., ):
+        return len(cand) == len(params) and all(
+            map(match_subtype, cand, params))
+    elif params[0] is Any:
+        return True
+    return all(match_subtype(el, params[0]) for el in sampled(cand, SAMPLE))
+
+
 def match_subtype(cand: Any, pattern: Any) -> bool:
     if fy.is_seqcoll(cand):
-        return issubclass(type(cand), pattern)
+        if get_args(pattern):
+            return match_generic(cand, pattern)
+        cand = type(cand)
+    try:
+        return subclass(cand, pattern)
+    except TypeError:  # unhashable, can't be a class
+        return False
+
+
+def distance(cand: Any, pattern: Any) -> float:
+    """How far up the MRO of ``cand`` that ``pattern`` is found, for
+    ranking subtype matches. Virtual base classes (e.g. ABC's) are
+    further away than any real one, and ``Any`` furthest away of all.
+    Parametrised generics are just closer than their origin.
+
+    >>> distance(bool, bool), distance(bool, int), distance(bool, object)
+    (0, 1, 2)
+    >>> distance([int], List[int]), distance([int], Sequence[int])
+    (-0.5, 1.5)
+
+    """
+    if pattern is Any:
+        return math.inf
+    closer: float = 0
+    if get_args(pattern) and get_origin(pattern) is not None:
+        pattern, closer = get_origin(pattern), 0.5
+    mro = getattr(type(cand) if fy.is_seqcoll(cand) else cand, '__mro__', ())
+    try:
+        return mro.index(pattern) - closer
+    except ValueError:
+        return len(mro) - closer
+
+
+def dominates(ranks: Sequence[float], others: Sequence[float]) -> bool:
+    "Checks if ``ranks`` is at least as close as ``others`` everywhere."
+    return ranks != others and all(map(lambda a, b: a <= b, ranks, others))
 
+
+def specificity(pattern: Any, other: Any) -> Optional[int]:
+    """Compares two pattern elements. Returns ``-1`` if ``pattern`` is
+    more specific than ``other``, ``1`` if it is less specific, ``0``
+    if they are the same and ``None`` if they don't overlap.
+
+    """
+    if pattern is other or pattern == other:
+        return 0
+    elif other is Any:
+        return -1
+    elif pattern is Any:
+        return 1
+    elif match_subtype(pattern, other):
+        return -1
+    elif match_subtype(other, pattern):
+        return 1
     else:
-        return issubclass(cand, pattern)
+        return None
+
+
+def plain(el: Any) -> bool:
+    """Is ``el`` a class whose subclass checks are decided by its MRO
+    alone? Excludes ``Any``, ABCs and other custom metaclasses."""
+    return type(el) is type and el is not Any
+
+
+def disjoint(pattern: Any, other: Any) -> bool:
+    """Can no single-inheritance candidate fit both ``pattern`` and
+    ``other`` as subtypes?
+
+    >>> disjoint((int, str), (int, float))
+    True
+    >>> disjoint((int, Any), (int, float))
+    False
+    >>> disjoint((int, ), (int, int))
+    True
+
+    """
+    pattern, other = box(pattern), box(other)
+    if any(el is ... for el in pattern + other):
+        return False
+    return len(pattern) != len(other) or any(
+        plain(a) and plain(b) and specificity(a, b) is None
+        for a, b in zip(pattern, other))
+
+
+def linear(el: Any) -> bool:
+    "Does every class in the MRO of ``el`` have at most one base?"
+    return all(
+        len(cls.__bases__) <= 1 for cls in getattr(el, '__mro__', ()))
 
 
 peek1 = lang.itempadded(1, NoNextValue)  # type: ignore[attr-defined]
@@ -124,6 +322,167 @@ def move(matched: Sequence,
         return Miss, Miss
 
 
+Tests = Tuple[Tuple[int, int, Any], ...]  # (bit, position, element)
+
+
+class SequenceAutomaton:
+    """Nondeterministic automaton compiled from a sequence pattern.
+
+    Concrete elements match one value each through ``matchfn``,
+    ``Any`` matches any one value and ``...`` one or more values. The
+    automaton is simulated over the set of possible pattern positions,
+    so matching backtracks correctly in time linear to the number of
+    values, e.g. ``(int, ..., str, ..., int)`` fits wherever ``str``
+    occurs.
+
+    Transitions are remembered per set of positions and outcome of
+    the tests of its concrete elements, so stepping over a value
+    allocates nothing once they are known.
+
+    >>> SequenceAutomaton((1, ..., 3, ..., 5)).accepts((1, 2, 3, 3, 4, 5))
+    True
+
+    """
+    def __init__(self, pattern: Sequence) -> None:
+        tokens: List[Any] = []
+        for el in pattern:
+            # `...` is one value followed by any number of values
+            tokens.extend((Any, ...) if el is ... else (el, ))
+        self.tokens = tuple(tokens)
+        self.final = len(tokens)
+        self.skips = tuple(self._skips(at) for at in range(self.final + 1))
+        self.tail = self.final - 1 if tokens and tokens[-1] is ... else None
+        self.start = self.skips[0]
+        self.moves: Dict[FrozenSet[int], Tuple[Tests,
+                                               Dict[int, FrozenSet[int]]]] = {}
+
+    def _skips(self, at: int) -> FrozenSet[int]:
+        "Positions reachable from ``at`` without consuming any value."
+        reach = {at}
+        while at < self.final and self.tokens[at] is ...:
+            at += 1
+            reach.add(at)
+        return frozenset(reach)
+
+    def step(self, positions: FrozenSet[int], value: Any,
+             matchfn: Callable) -> FrozenSet[int]:
+        "Positions reachable from ``positions`` by consuming ``value``."
+        try:
+            tests, moves = self.moves[positions]
+        except KeyError:
+            tests, moves = self.moves[positions] = self._tests(positions), {}
+        outcome = 0
+        for bit, _, token in tests:
+            if matchfn(value, token):
+                outcome |= bit
+        try:
+            return moves[outcome]
+        except KeyError:
+            ahead = moves[outcome] = self._ahead(positions, tests, outcome)
+            return ahead
+
+    def _tests(self, positions: FrozenSet[int]) -> Tests:
+        "The concrete elements at ``positions``, a bit for each."
+        concrete = sorted(at for at in positions if at < self.final
+                          and self.tokens[at] is not Any
+                          and self.tokens[at] is not ...)
+        return tuple(
+            (1 << n, at, self.tokens[at]) for n, at in enumerate(concrete))
+
+    def _ahead(self, positions: FrozenSet[int], tests: Tests,
+               outcome: int) -> FrozenSet[int]:
+        "Positions reached from ``positions`` given the tests' ``outcome``."
+        ahead: Set[int] = set()
+        for at in positions:
+            if at < self.final and self.tokens[at] is ...:
+                ahead.update(self.skips[at])
+            elif at < self.final and self.tokens[at] is Any:
+                ahead.update(self.skips[at + 1])
+        for bit, at, _ in tests:
+            if outcome & bit:
+                ahead.update(self.skips[at + 1])
+        return frozenset(ahead)
+
+    def accepts(self, values: Sequence, matchfn: Callable = match) -> bool:
+        positions = self.start
+        for value in values:
+            if self.tail in positions:
+                return True  # (the rest is swallowed by a trailing `...`)
+            positions = self.step(positions, value, matchfn)
+            if not positions:
+                return False
+        return self.final in positions
+
+    def accepts_runs(self, runs: Runs, matchfn: Callable = match) -> bool:
+        """Like ``accepts()`` but consumes a run-length encoded sequence
+        of values. Time is bound by the number of runs and the length
+        of the pattern, not by the number of values.
+
+        """
+        positions = self.start
+        for value, count in runs.runs:
+            for _ in range(count):
+                if self.tail in positions:
+                    return True
+                ahead = self.step(positions, value, matchfn)
+                if not ahead:
+                    return False
+                if ahead == positions:
+                    break  # (the rest of the run changes nothing)
+                positions = ahead
+        return self.final in positions
+
+
+@lru_cache(maxsize=1024)
+def _compiled(pattern: Sequence) -> SequenceAutomaton:
+    return SequenceAutomaton(pattern)
+
+
+def automaton(pattern: Sequence) -> SequenceAutomaton:
+    "Compiles ``pattern``, reusing earlier compilations when possible."
+    try:
+        return _compiled(pattern)
+    except TypeError:  # unhashable, can't be cached
+        return SequenceAutomaton(pattern)
+
+
+def fits(values: Sequence, pattern: Any, matchfn: Callable = match) -> bool:
+    """Checks if ``values`` fits one single ``pattern``.
+
+    Patterns without ``...`` are checked value by value, the ones with
+    are compiled to a `SequenceAutomaton`. No copies are made of
+    either sequence.
+
+    :param values: A sequence of values to match.
+    :param pattern: The pattern ``values`` is checked against.
+
+    :return: ``True`` if the whole of ``values`` was consumed by
+             ``pattern``, otherwise ``False``.
+
+    """
+    if isinstance(values, Runs):
+        pending = box(pattern)
+        return (type(pending) is values.container
+                and automaton(cast(Sequence, pending)).accepts_runs(
+                    values, matchfn))
+
+    matched, pending = box(values), box(pattern)
+    if type(matched) != type(pending):
+        return False
+
+    if any(el is ... for el in pending):
+        return automaton(pending).accepts(matched, matchfn)
+
+    if len(matched) != len(pending):
+        return False
+
+    for value, against in zip(matched, pending):
+        if against is not Any and not matchfn(value, against):
+            return False
+
+    return True
+
+
 def matches(values: Sequence,
             patterns: Sequence,
             matchfn: Callable = match) -> Sequence:
@@ -137,31 +496,864 @@ def matches(values: Sequence,
 
     """
     for pattern in box(patterns):
-        # Operate on copies ->
-        matched, pending = box(values)[:], box(pattern)[:]
-        while matched or pending:
-            # (-> comsumes the copies)
-            matched, pending = move(matched, pending, matchfn)
-            if matched is Miss:
-                break
-        if matched is Miss:
-            continue
-        else:
+        if fits(values, pattern, matchfn):
             return pattern
 
     return Miss
 
 
+Indexed = Tuple[float, Any]  # (registration order, pattern)
+
+NotIndexed = (float('inf'), Miss)
+
+
+def hashed(value: Any) -> Any:
+    """Hashable stand-in for ``value`` that compares like ``match()``
+    does. Raises ``TypeError`` if there isn't one.
+
+    """
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        frozen = kind.cast_to_hashable(value)
+        hash(frozen)
+        return frozen
+
+
+class TrieNode:
+    """One position in a `PatternTrie`: concrete values branch through
+    ``edges``, `Predicate`'s through the index of their family in
+    ``families``, ``Any`` through ``wildcard`` and ``...`` through
+    ``spread``. A node reached through ``spread`` ``loop``'s, i.e. it
+    can consume any number of further values.
+
+    """
+    __slots__ = ('edges', 'families', 'wildcard', 'spread', 'loop',
+                 'accepts')
+
+    def __init__(self, loop: bool = False) -> None:
+        self.edges: Dict[Any, TrieNode] = {}
+        self.families: Dict[type, PredicateIndex] = {}
+        self.wildcard: Optional[TrieNode] = None
+        self.spread: Optional[TrieNode] = None
+        self.loop = loop
+        self.accepts: Indexed = NotIndexed
+
+    def fallbacks(self) -> Iterable['TrieNode']:
+        "Nodes reached whatever the next value is."
+        if self.wildcard:
+            yield self.wildcard
+        if self.spread:
+            yield self.spread
+        if self.loop:
+            yield self
+
+    def follow(self, predicate: 'Predicate') -> 'TrieNode':
+        "Node reached by values fitting ``predicate``."
+        family = self.families.get(predicate.index)
+        if family is None:
+            family = self.families[predicate.index] = predicate.index()
+        return family.add(predicate)
+
+
+class Predicate:  # (no ABCMeta, it makes isinstance() checks slower)
+    """Base for pattern elements that test values rather than equal
+    them. Predicates of one family are indexed together by their
+    ``index`` class (see `PredicateIndex`), so a lookup doesn't try
+    them one by one.
+
+    Subclasses give their parameters as ``params()``, which they are
+    compared and hashed by. Predicates of a ``ranked`` family can be
+    more specific than others of it (e.g. a longer `Prefix`, see
+    ``refines()``), which wins over registration order when several
+    patterns fit.
+
+    """
+    __slots__ = ()
+    index: Type['PredicateIndex']
+    ranked = False
+
+    @abstractmethod
+    def __call__(self, value: Any) -> bool:
+        ...  # pragma: nocov
+
+    @abstractmethod
+    def params(self) -> Tuple:
+        ...  # pragma: nocov
+
+    def refines(self, other: Any) -> bool:
+        "Does every value fitting this predicate also fit ``other``?"
+        return False
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.params() == other.params()
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.params()))
+
+    def __reduce__(self) -> Tuple[Any, Tuple]:
+        return type(self), self.params()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}{self.params()!r}"
+
+
+class PredicateIndex:
+    """Finds which of a family of `Predicate`'s fit a value, as the set
+    of `TrieNode`'s they lead to. This base version tries them all;
+    subclasses index them.
+
+    """
+    def __init__(self) -> None:
+        self.nodes: Dict[Predicate, TrieNode] = {}
+
+    def add(self, predicate: Predicate) -> TrieNode:
+        try:
+            return self.nodes[predicate]
+        except KeyError:
+            node = self.nodes[predicate] = TrieNode()
+            return node
+
+    def find(self, value: Any) -> FrozenSet[TrieNode]:
+        return frozenset(node for predicate, node in self.nodes.items()
+                         if predicate(value))
+
+
+def ordering(value: Any) -> type:
+    """The kind of values that ``value`` can be ordered among: real
+    numbers (and decimals), ``str``, ``bytes`` or else its own type.
+
+    >>> ordering(1) is ordering(0.5) is not ordering('a')
+    True
+
+    """
+    if isinstance(value, (numbers.Real, Decimal)):
+        return numbers.Real
+    return textual(value) or type(value)
+
+
+class RangeIndex(PredicateIndex):
+    """Index of `Range`'s, as a sorted array of their ends per kind of
+    ends (see ``ordering()``).
+
+    The ends split the line into elementary segments (each end, and
+    the gap before, between and after them), and each segment knows
+    the ranges covering it. A lookup is a binary search for the
+    segment, O(log n) in the number of ranges.
+
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self.kinds: Dict[type, Tuple[List[Any],
+                                     List[FrozenSet[TrieNode]]]] = {}
+        self.unbounded: FrozenSet[TrieNode] = frozenset()
+        self.stale = True
+
+    def add(self, predicate: Predicate) -> TrieNode:
+        self.stale = True
+        return super().add(predicate)
+
+    def build(self) -> None:
+        ranges = cast(Dict[Range, TrieNode], self.nodes)
+        self.unbounded = frozenset(node for predicate, node in ranges.items()
+                                   if predicate.kind is None)
+        grouped: Dict[type, List[Tuple[Range, TrieNode]]] = {}
+        for predicate, node in ranges.items():
+            kind = predicate.kind
+            if kind is not None:
+                grouped.setdefault(kind, []).append((predicate, node))
+        self.kinds = {
+            kind: self.segmented(group)
+            for kind, group in grouped.items()
+        }
+        self.stale = False
+
+    def segmented(self, ranges: List[Tuple['Range', TrieNode]]
+                  ) -> Tuple[List[Any], List[FrozenSet[TrieNode]]]:
+        "Sorted ends of ``ranges``, and the nodes covering each segment."
+        ends = sorted({
+            end
+            for predicate, _ in ranges
+            for end in predicate.params() if end is not None
+        })
+        # (segment 2i is the gap before end i, 2i + 1 the end itself)
+        covering: List[Set[TrieNode]] = [
+            set(self.unbounded) for _ in range(len(ends) * 2 + 1)
+        ]
+        for predicate, node in ranges:
+            lo, hi = predicate.params()
+            first = 0 if lo is None else bisect_left(ends, lo) * 2 + 1
+            last = (len(covering) - 1
+                    if hi is None else bisect_left(ends, hi) * 2 + 1)
+            for segment in covering[first:last + 1]:
+                segment.add(node)
+        return ends, [frozenset(nodes) for nodes in covering]
+
+    def find(self, value: Any) -> FrozenSet[TrieNode]:
+        if self.stale:
+            self.build()
+        try:
+            ends, segments = self.kinds[ordering(value)]
+            at = bisect_left(ends, value)
+            exact = at < len(ends) and ends[at] == value
+        except (KeyError, TypeError):  # not comparable to any ends
+            return self.unbounded
+        if not exact and at == 0 and value != value:
+            return self.unbounded  # (NaN, past the ends of every range)
+        return segments[at * 2 + 1 if exact else at * 2]
+
+
+class Range(Predicate):
+    """Inclusive interval pattern, fitting values ``lo <= value <= hi``.
+    Either end can be ``None`` for an open-ended interval. Values that
+    can't be compared to the ends don't fit.
+
+    >>> Range(200, 299)(204), Range(200, 299)(404), Range(500, None)(503)
+    (True, False, True)
+
+    """
+    __slots__ = ('lo', 'hi')
+    index = RangeIndex
+
+    def __init__(self, lo: Any, hi: Any) -> None:
+        if lo is not None and hi is not None:
+            if ordering(lo) is not ordering(hi):
+                raise ValueError(f'Range ends {lo!r} and {hi!r} can not '
+                                 'be compared')
+            if hi < lo:
+                raise ValueError(f'Empty range {lo!r}..{hi!r}')
+        self.lo, self.hi = lo, hi
+
+    def __call__(self, value: Any) -> bool:
+        try:
+            return ((self.lo is None or self.lo <= value)
+                    and (self.hi is None or value <= self.hi))
+        except TypeError:
+            return False
+
+    def params(self) -> Tuple:
+        return self.lo, self.hi
+
+    @property
+    def kind(self) -> Optional[type]:
+        "The kind of the ends, see ``ordering()``."
+        end = self.hi if self.lo is None else self.lo
+        return None if end is None else ordering(end)
+
+
+class AffixIndex(PredicateIndex):
+    """Index of `Prefix`'s, as a character trie per kind of string. A
+    lookup walks it once along the value, and gives every prefix the
+    value has. Subclasses walk strings differently.
+
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self.roots: Optional[Dict[type, Dict[Any, Any]]] = None
+
+    @staticmethod
+    def walk(text: Union[str, bytes]) -> Iterator:
+        return iter(text)
+
+    def add(self, predicate: Predicate) -> TrieNode:
+        self.roots = None
+        return super().add(predicate)
+
+    def build(self) -> Dict[type, Dict[Any, Any]]:
+        # (shorter affixes first, so each level can hold the nodes of
+        # all affixes leading to it; no char is ``None``)
+        roots: Dict[type, Dict[Any, Any]] = {}
+        for predicate, node in sorted(self.nodes.items(),
+                                      key=lambda item: len(
+                                          cast(Prefix, item[0]).affix)):
+            affix = cast(Prefix, predicate).affix
+            level = roots.setdefault(cast(type, textual(affix)),
+                                     {None: frozenset()})
+            for char in self.walk(affix):
+                if char not in level:
+                    level[char] = {None: level[None]}
+                level = level[char]
+            level[None] = level[None] | {node}
+        return roots
+
+    def find(self, value: Any) -> FrozenSet[TrieNode]:
+        if self.roots is None:
+            self.roots = self.build()
+        kind = textual(value)
+        level = self.roots.get(kind) if kind else None
+        if level is None:
+            return frozenset()
+        found = level[None]
+        for char in self.walk(value):
+            level = level.get(char)
+            if level is None:
+                break
+            found = level[None]
+        return found
+
+
+class SuffixIndex(AffixIndex):
+    "Index of `Suffix`'s, as a character trie of reversed strings."
+
+    @staticmethod
+    def walk(text: Union[str, bytes]) -> Iterator:
+        return reversed(text)
+
+
+class GlobIndex(PredicateIndex):
+    """Index of `Glob`'s, as one regular expression with an alternative
+    per glob. A lookup finds the first registered glob fitting the
+    value with it. That one wins if all the globs end their patterns;
+    else the later ones are tried one by one, as patterns through them
+    may fit where the first one's don't.
+
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self.regex: Optional[Pattern] = None
+        self.globs: List[Tuple[Glob, TrieNode]] = []
+        self.final = False
+
+    def add(self, predicate: Predicate) -> TrieNode:
+        self.regex = None
+        return super().add(predicate)
+
+    def find(self, value: Any) -> FrozenSet[TrieNode]:
+        if not isinstance(value, str):
+            return frozenset()
+        if self.regex is None:
+            self.globs = [(cast(Glob, predicate), node)
+                          for predicate, node in self.nodes.items()]
+            self.final = not any(node.edges or node.families
+                                 or node.wildcard or node.spread
+                                 for _, node in self.globs)
+            self.regex = re.compile('|'.join(
+                f'(?P<glob{at}>{translate(glob.glob)})'
+                for at, (glob, _) in enumerate(self.globs)))
+        fitting = self.regex.match(value)
+        if fitting is None:
+            return frozenset()
+        first = int(cast(str, fitting.lastgroup)[len('glob'):])
+        if self.final:  # (the first registered wins, see `PatternTrie`)
+            return frozenset((self.globs[first][1], ))
+        return frozenset((self.globs[first][1], *(
+            node for glob, node in self.globs[first + 1:] if glob(value))))
+
+
+def textual(value: Any) -> Optional[type]:
+    "The kind of string ``value`` is, ``str`` or ``bytes``, if any."
+    return (str if isinstance(value, str) else
+            bytes if isinstance(value, bytes) else None)
+
+
+class Prefix(Predicate):
+    """Pattern for strings (or bytes) starting with ``affix``. Of
+    patterns otherwise the same, the one with the longest fitting
+    prefix wins.
+
+    >>> Prefix('orders.')('orders.created'), Prefix('orders.')('users')
+    (True, False)
+
+    """
+    __slots__ = ('affix', )
+    index = AffixIndex
+    ranked = True
+
+    def __init__(self, affix: Union[str, bytes]) -> None:
+        if textual(affix) is None:
+            raise TypeError(f'Expected str or bytes, got {affix!r}')
+        self.affix = affix
+
+    def __call__(self, value: Any) -> bool:
+        return textual(value) is textual(
+            self.affix) and value.startswith(self.affix)
+
+    def params(self) -> Tuple:
+        return (self.affix, )
+
+    def refines(self, other: Any) -> bool:
+        return type(other) is type(self) and other(self.affix)
+
+
+class Suffix(Prefix):
+    """Pattern for strings (or bytes) ending with ``affix``. Of
+    patterns otherwise the same, the one with the longest fitting
+    suffix wins.
+
+    >>> Suffix('.json')('orders.json'), Suffix('.json')('orders.xml')
+    (True, False)
+
+    """
+    __slots__ = ()
+    index = SuffixIndex
+
+    def __call__(self, value: Any) -> bool:
+        return textual(value) is textual(
+            self.affix) and value.endswith(self.affix)
+
+
+class Glob(Predicate):
+    """Pattern for strings fitting a shell-style wildcard ``glob``, as
+    by ``fnmatch.fnmatchcase()``. Of several fitting globs, the first
+    registered wins, like with any other pattern.
+
+    >>> Glob('orders.*.json')('orders.2020.json'), Glob('*.json')('x.xml')
+    (True, False)
+
+    """
+    __slots__ = ('glob', 'regex')
+    index = GlobIndex
+
+    def __init__(self, glob: str) -> None:
+        self.glob = glob
+        self.regex = re.compile(translate(glob))
+
+    def __call__(self, value: Any) -> bool:
+        return isinstance(value, str) and self.regex.match(value) is not None
+
+    def params(self) -> Tuple:
+        return (self.glob, )
+
+
+class TrieState:
+    """A set of `TrieNode`'s that are all consistent with the values
+    seen so far, i.e. a state in the lazily built deterministic
+    automaton of a `PatternTrie`.
+
+    """
+    __slots__ = ('trie', 'nodes', 'keys', 'families', 'moves', 'otherwise',
+                 'accepts')
+
+    def __init__(self, trie: 'PatternTrie', nodes: FrozenSet[TrieNode]):
+        self.trie, self.nodes = trie, nodes
+        self.keys: Set[Any] = set()
+        self.families: List[PredicateIndex] = []
+        for node in nodes:
+            self.keys.update(node.edges)
+            self.families.extend(node.families.values())
+        self.moves: Dict[Any, TrieState] = {}
+        # (keyed by the nodes the predicates lead to, as values without
+        # an edge only differ by those)
+        self.otherwise: Dict[Tuple[FrozenSet[TrieNode], ...], TrieState] = {}
+        self.accepts = min((node.accepts for node in nodes),
+                           default=NotIndexed)
+        if trie.ranked:
+            self.accepts = self.ranking()
+
+    def ranking(self) -> Indexed:
+        """The earliest registered pattern accepted here that no other
+        accepted one refines (see ``refines()``)."""
+        accepted = sorted(node.accepts for node in self.nodes
+                          if node.accepts is not NotIndexed)
+        return next((indexed for indexed in accepted
+                     if not any(refines(other[1], indexed[1])
+                                for other in accepted)), NotIndexed)
+
+    def step(self, value: Any) -> 'TrieState':
+        "Next state after having seen ``value``."
+        try:
+            return self.moves[value]
+        except KeyError:
+            pass
+        except TypeError:
+            try:
+                value = hashed(value)
+            except TypeError:  # can't equal any concrete edge
+                value = NoNextValue
+
+        found = tuple(family.find(value) for family in self.families)
+        if value not in self.keys:
+            try:
+                return self.otherwise[found]
+            except KeyError:
+                state = self.otherwise[found] = self.trie.state(
+                    fy.chain(fy.mapcat(TrieNode.fallbacks, self.nodes),
+                             *found))
+                return state
+
+        state = self.moves[value] = self.trie.state(
+            fy.chain((node.edges[value]
+                      for node in self.nodes if value in node.edges),
+                     fy.mapcat(TrieNode.fallbacks, self.nodes), *found))
+        return state
+
+
+class PatternTrie:
+    """Position-wise decision trie over patterns.
+
+    Lookups walk a deterministic automaton whose states are sets of
+    trie nodes. States and their transitions are created on demand
+    and remembered, so each value of a call signature is inspected
+    once. The winner is the earliest registered pattern among all that
+    fit, like with ``matches()``, unless another one that fits refines
+    it (e.g. with a longer `Prefix`, see ``refines()``).
+
+    """
+    def __init__(self) -> None:
+        self.root = TrieNode()
+        self.ranked = False
+        self.states: Dict[FrozenSet[TrieNode], TrieState] = {}
+        self.start = self.state((self.root, ))
+
+    def add(self, order: int, pattern: Any) -> None:
+        node = self.root
+        for el in box(pattern):
+            if el is Any:
+                if node.wildcard is None:
+                    node.wildcard = TrieNode()
+                node = node.wildcard
+            elif el is ...:
+                if node.spread is None:
+                    node.spread = TrieNode(loop=True)
+                node = node.spread
+            elif isinstance(el, Predicate):
+                self.ranked = self.ranked or el.ranked
+                node = node.follow(el)
+            else:
+                node = node.edges.setdefault(hashed(el), TrieNode())
+        node.accepts = min(node.accepts, (order, pattern))
+        self.states.clear()  # (already built states are stale)
+        self.start = self.state((self.root, ))
+
+    def state(self, nodes: Iterable[TrieNode]) -> TrieState:
+        key = frozenset(nodes)
+        try:
+            return self.states[key]
+        except KeyError:
+            state = self.states[key] = TrieState(self, key)
+            return state
+
+    def lookup(self, sig: Tuple) -> Indexed:
+        state = self.start
+        for value in sig:
+            state = state.step(value)
+            if not state.nodes:
+                break
+        return state.accepts
+
+    def lookup_runs(self, sig: Runs) -> Indexed:
+        state = self.start
+        for value, count in sig.runs:
+            for _ in range(count):
+                ahead = state.step(value)
+                if ahead is state:
+                    break  # (the rest of the run changes nothing)
+                state = ahead
+            if not state.nodes:
+                break
+        return state.accepts
+
+
+class DispatchIndex:
+    """Compiled lookup structure over the patterns of a `Matcher`.
+
+    Patterns are sorted into buckets when the index is built:
+
+    - ``exact``: patterns where every element is concrete (e.g. no
+      ``Any`` or ``...``), keyed by the whole boxed pattern. Call
+      signatures with unhashable elements are looked up the way
+      ``match()`` compares them, via ``kind.cast_to_hashable()``.
+    - ``trie``: patterns containing ``Any`` or ``...``, compiled to a
+      `PatternTrie`.
+
+    Each entry remembers its registration order, so a lookup gives
+    the same answer as a linear ``matches()`` scan. The trie is only
+    walked if no exact pattern registered before all of its patterns
+    fits.
+
+    """
+    def __init__(self, patterns: Iterable[Any],
+                 concrete: Callable[[Any], bool]) -> None:
+        self.concrete = concrete
+        self.exact: Dict[Any, Indexed] = {}
+        self.arities: Set[int] = set()
+        self.trie = PatternTrie()
+        self.bound = math.inf  # order of the first pattern in the trie
+        for order, pattern in enumerate(patterns):
+            self.add(order, pattern)
+
+    def add(self, order: int, pattern: Any) -> None:
+        boxed = box(pattern)
+        if all(self.concrete(el) for el in boxed):
+            self.exact.setdefault(boxed, (order, pattern))
+            self.arities.add(len(boxed))
+        else:
+            self.trie.add(order, pattern)
+            self.bound = min(self.bound, order)
+
+    def lookup(self, values: Sequence) -> Any:
+        """Finds the first registered pattern matching ``values``, or
+        ``Miss``.
+
+        """
+        if isinstance(values, Runs):
+            return self.lookup_runs(values)
+
+        sig = box(values)
+        if type(sig) is not tuple:
+            return Miss  # never fits a (boxed) pattern
+
+        try:
+            best = self.exact.get(sig, NotIndexed)
+        except TypeError:  # compare like `match()` does
+            try:
+                frozen = tuple(map(kind.cast_to_hashable, sig))
+                best = self.exact.get(frozen, NotIndexed)
+            except TypeError:  # still unhashable, can't equal a pattern
+                best = NotIndexed
+
+        if best[0] > self.bound:
+            best = min(best, self.trie.lookup(sig))
+
+        return best[1]
+
+    def lookup_runs(self, values: Runs) -> Any:
+        """Like ``lookup()``, for a run-length encoded signature. Only
+        expands it if there are exact patterns of the same length.
+
+        """
+        if values.container is not tuple:
+            return Miss
+
+        best = NotIndexed
+        if len(values) in self.arities:
+            best = self.exact.get(values.expand(), best)
+
+        if best[0] > self.bound:
+            best = min(best, self.trie.lookup_runs(values))
+
+        return best[1]
+
+
 def resolve_pattern(params: Any, opts: Any) -> TypePatternCand:
     safeboxed = box(unbox(params))
     return safeboxed if len(opts) == 0 else (*safeboxed, Mapping)
 
 
+@lru_cache(maxsize=None)
+def described_by_class(cls: type) -> Optional[bool]:
+    """Does ``xrtype()`` describe instances of ``cls`` as ``cls``?
+    Instances of some classes are described by their ``__name__``
+    instead, if they have one, hence ``None`` for "maybe".
+
+    >>> described_by_class(int), described_by_class(type(len))
+    (True, False)
+
+    """
+    if cls in LISTLIKE:
+        return False
+    attrs = [vars(klass) for klass in cls.__mro__]
+    if any('__name__' in names for names in attrs):
+        return False
+    elif cls.__dictoffset__ or any('__getattr__' in names for names in attrs):
+        return None
+    return True
+
+
+def overlaps(pattern: Tuple, other: Tuple) -> bool:
+    """Could a call fit both the fixed-length ``pattern`` and ``other``,
+    comparing their elements by equality? `Predicate`'s are assumed to
+    overlap anything.
+
+    >>> overlaps((1, Any), (Any, 2)), overlaps((1, 2), (2, ...))
+    (True, False)
+
+    """
+    return fits(
+        pattern, other, lambda el, against: el is Any or el == against or
+        isinstance(el, Predicate) or isinstance(against, Predicate))
+
+
+def refines(pattern: Any, other: Any) -> bool:
+    """Is ``pattern`` more specific than ``other`` by a ranked
+    `Predicate` (see ``Predicate.refines()``), and else the same?
+
+    >>> refines((Prefix('ab'), 1), (Prefix('a'), 1))
+    True
+    >>> refines((Prefix('ab'), 1), (Prefix('a'), 2))
+    False
+
+    """
+    pattern, other = box(pattern), box(other)
+    if len(pattern) != len(other):
+        return False
+    strictly = False
+    for el, against in zip(pattern, other):
+        if el is against or el == against:
+            continue
+        if not (isinstance(el, Predicate) and el.ranked
+                and el.refines(against)):
+            return False
+        strictly = True
+    return strictly
+
+
+def bind(namespace: Dict[str, Any], prefix: str, value: Any) -> str:
+    "Names ``value`` in ``namespace`` for generated source to refer to."
+    for name, bound in namespace.items():
+        if bound is value and name.startswith(prefix):
+            return name
+    name = f'{prefix}{len(namespace)}'
+    namespace[name] = value
+    return name
+
+
+Invoker = Callable[[Sequence, Mapping], Any]
+
+
+def handler_params(handler: Callable) -> Optional[Collection[Parameter]]:
+    "The parameters of ``handler``, or ``None`` if it has no signature."
+    try:
+        return decl.params(handler).values()
+    except (TypeError, ValueError):
+        return None
+
+
+def spreading(handler: Callable) -> Callable:
+    """Adapts ``handler`` to be called with positional arguments only,
+    the way ``invoker()`` calls it, i.e. ignoring them if it takes none.
+
+    """
+    invoke = invoker(handler)
+    if isinstance(invoke, partial):  # (see `nullary()`)
+        return lambda *args: invoke(args, {})
+    return handler
+
+
+def nullary(handler: Callable, args: Sequence, kwargs: Mapping) -> Any:
+    "Call adapter for handlers that take no arguments, see ``invoker()``."
+    return handler()
+
+
+def invoker(handler: Callable) -> Invoker:
+    """Builds a call adapter ``(args, kwargs) -> result`` for
+    ``handler``.
+
+    The handler's signature is inspected once, here, so that
+    dispatching doesn't have to. Positional arguments are spread the
+    same way as call signatures are, i.e. a single sequence argument
+    is passed on as separate arguments.
+
+    """
+    params = handler_params(handler)
+    if params is not None and len(params) == 0:
+        return partial(nullary, handler)
+
+    def spread(args: Sequence, kwargs: Mapping) -> Any:
+        if len(args) == 1 and type(args[0]) in LISTLIKE:
+            args = args[0]
+        return handler(*args, **kwargs)
+
+    return spread
+
+
 MatchArgT = TypeVar('MatchArgT')
 MatchRetT = TypeVar('MatchRetT')
 
 DecoratorCases = Tuple[Callable[..., Any], Sequence[Any]]
 
+CacheInfo = namedtuple('CacheInfo', 'hits misses maxsize currsize')
+
+
+class Profile:
+    """Dispatch statistics gathered by an instrumented `Matcher`, see
+    ``Matcher.instrument()``.
+
+    """
+    def __init__(self) -> None:
+        self.calls = 0
+        self.misses = 0
+        self.hits: Counter = Counter()  # per pattern
+        self.seconds = {'callsign': 0.0, 'match': 0.0, 'handler': 0.0}
+
+    def asdict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'misses': self.misses,
+            'hits': dict(self.hits),
+            'seconds': dict(self.seconds),
+        }
+
+
+class Memo:
+    """Remembered results of a pure handler, the ``maxsize`` most
+    recently used, see ``pure()``.
+
+    """
+    __slots__ = ('results', 'maxsize', 'hits', 'misses')
+
+    def __init__(self, maxsize: int) -> None:
+        self.results: 'OrderedDict[Tuple, Any]' = OrderedDict()
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+
+    def recall(self, key: Tuple) -> Any:
+        result = self.results[key]
+        self.results.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def remember(self, key: Tuple, result: Any,
+                 index: Dict[Tuple, 'Memo']) -> None:
+        "Adds ``result`` for ``key``, also to the matcher's ``index``."
+        self.misses += 1
+        self.results[key], index[key] = result, self
+        if len(self.results) > self.maxsize:
+            forgotten, _ = self.results.popitem(last=False)
+            del index[forgotten]
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize,
+                         len(self.results))
+
+
+def typed(value: Any) -> Tuple[type, Any]:
+    """Hashable stand-in for ``value`` tagged with its type, and with
+    the types of any items in it, recursively. Raises ``TypeError`` if
+    there isn't one.
+
+    >>> typed([1]) == typed([1.0]), typed((1, 'a')) == typed((1, 'a'))
+    (False, True)
+
+    """
+    if isinstance(value, (list, tuple)):
+        return type(value), tuple(map(typed, value))
+    elif isinstance(value, (set, frozenset)):
+        return type(value), frozenset(map(typed, value))
+    elif isinstance(value, abc.Mapping):
+        return type(value), frozenset(
+            (typed(key), typed(item)) for key, item in value.items())
+    return type(value), hashed(value)
+
+
+def memokey(args: Sequence, kwargs: Mapping) -> Tuple:
+    """Hashable key for a call to a pure handler. Arguments are told
+    apart by type too, also inside containers, e.g. ``1`` and ``True``,
+    or ``[1]`` and ``[1.0]``, are different calls. Raises
+    ``TypeError`` if an argument has no hashable stand-in.
+
+    """
+    key = tuple(map(typed, args))
+    if kwargs:
+        key += tuple(
+            sorted((name, typed(value)) for name, value in kwargs.items()))
+    return key
+
+
+_worker_matcher: Optional['Matcher'] = None  # in `Matcher.pmap()` workers
+
+
+def _install_worker(payload: bytes) -> None:
+    global _worker_matcher
+    _worker_matcher = pickle.loads(payload)
+
+
+def _worker_map(items: List[Any]) -> List[Any]:
+    return cast(Matcher, _worker_matcher).map(items)
+
 
 class Matcher(dict, Generic[MatchArgT, MatchRetT]):
     """Common base for all matcher classes.
@@ -171,6 +1363,368 @@ class Matcher(dict, Generic[MatchArgT, MatchRetT]):
 
     """
     __case__: DecoratorCases
+    __cases__: Tuple[Tuple[Any, str], ...] = ()  # (pattern, method name)
+    _index: Optional[DispatchIndex]
+    _invokers: Dict[Any, Invoker]
+    _cache: 'OrderedDict[Any, Any]'
+    _profile: Optional[Profile] = None
+    _compiled: Optional[Callable[..., MatchRetT]]
+    _memos: Dict[Any, Memo]  # per pattern with a pure handler
+    _memoed: Dict[Tuple, Memo]  # which memo remembers a call
+
+    _keywords: Optional[Dict[FrozenSet[str], List[Tuple[Any, Tuple,
+                                                       Keywords]]]]
+
+    cache_size = 0  # max number of resolved call signatures to remember
+    matchfn = staticmethod(match)  # compares call signatures to patterns
+    invoker = staticmethod(invoker)  # builds call adapters for handlers
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        """Collects cases declared as methods with ``@case`` /
+        ``@value_case`` once, when the matcher class is created.
+
+        """
+        super(Matcher, cls).__init_subclass__(**kwargs)  # type: ignore
+        attrs: Dict[str, Any] = {}
+        for klass in reversed(cls.__mro__):
+            attrs.update(vars(klass))
+        cls.__cases__ = tuple((attr.__case__, name)
+                              for name, attr in attrs.items()
+                              if hasattr(attr, '__case__'))
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super(Matcher, self).__init__(*args, **kwargs)
+        for pattern, name in self.__cases__:
+            super(Matcher, self).__setitem__(pattern, getattr(self, name))
+        if Miss in self:  # use the marker itself as key, e.g. if unpickled
+            missed = super(Matcher, self).pop(Miss)
+            super(Matcher, self).__setitem__(Miss, missed)
+        self._hits = self._misses = 0
+        self._generation = 0
+        self._inlined: List[Tuple[Matcher, int]] = []
+        self._reinvokers()
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        "Drops compiled state, called whenever the set of cases changes."
+        self._index = None
+        self._keywords = None
+        self._cache = OrderedDict()
+        self._forget()
+        self._outdate()
+
+    def _forget(self) -> None:
+        "Drops results remembered for pure handlers."
+        self._memoed = {}
+        for memo in self._memos.values():
+            memo.results.clear()
+
+    def _outdate(self) -> None:
+        "Marks functions generated by ``compile()`` as out of date."
+        self._compiled = None
+        self._generation += 1
+
+    def cache_info(self) -> CacheInfo:
+        "Statistics for the signature cache, like ``functools.lru_cache``."
+        return CacheInfo(self._hits, self._misses, self.cache_size,
+                         len(self._cache))
+
+    def cache_clear(self) -> None:
+        "Empties the signature cache and resets its statistics."
+        self._hits = self._misses = 0
+        self._cache.clear()
+
+    def compile(self) -> Callable[..., MatchRetT]:
+        """Returns a dispatch function generated from the current cases
+        (see ``dispatch_source()``). It behaves like calling the matcher
+        itself, but calls whose case can be found by testing their
+        arguments directly skip the generic machinery: no call
+        signature is built, nothing is cached or profiled.
+
+        Handlers that are matchers themselves are compiled into the
+        same function, so that nesting matchers costs no extra
+        dispatch.
+
+        The function is generated again on first use after the matcher
+        (or a matcher compiled into it) has been changed.
+
+        """
+        if self._compiled is None or any(
+                inner._generation != generation
+                for inner, generation in self._inlined):
+            namespace: Dict[str, Any] = {'LISTLIKE': LISTLIKE}
+            source = self.dispatch_source(namespace)
+            exec(compile(source, f'<{type(self).__name__}.compile>', 'exec'),
+                 namespace)
+            self._compiled = cast(Callable[..., MatchRetT],
+                                  namespace['dispatch'])
+        return self._compiled
+
+    inline_below = 4  # consecutive cases tested inline, more are looked up
+
+    def compilable(self, arity: int) -> bool:
+        "Can calls with ``arity`` arguments be compiled?"
+        return arity > 0
+
+    def rules(self, arity: int, namespace: Dict[str, Any]
+              ) -> Iterator[Tuple[Tuple, List[str], Callable]]:
+        """The cases calls with ``arity`` arguments can be tested
+        against, in order, as ``(pattern, conditions, handler)``.
+        Conditions are source code testing the arguments ``a0, a1...``
+        (see ``conditions()``). Cases that can't be tested for, and
+        cases that calls for those could be mistaken for, are left out.
+
+        """
+        untestable: List[Tuple] = []
+        for pattern, handler in self.items():
+            sig = box(pattern)
+            variadic = type(sig) is tuple and any(el is ... for el in sig)
+            if (type(sig) is not tuple or len(sig) != arity and not variadic
+                    or sig and isinstance(sig[-1], Keywords)):
+                continue  # (no keyword arguments in compiled calls)
+            conds = (None if pattern is Miss or variadic
+                     or isinstance(handler, Pure) else  # (see `__call__`)
+                     self.conditions(sig, namespace))
+            if conds is None or any(
+                    overlaps(sig, other) for other in untestable):
+                untestable.append(sig)
+            else:
+                yield sig, conds, handler
+
+    def conditions(self, sig: Tuple,
+                   namespace: Dict[str, Any]) -> Optional[List[str]]:
+        "Source testing if arguments fit ``sig``, compared by value."
+        if any(isinstance(el, Predicate) and el.ranked for el in sig):
+            return None  # (depends on the other patterns, see `Predicate`)
+        return [
+            f'{bind(namespace, "p", el)}(a{at})' if isinstance(
+                el, Predicate) else f'a{at} == {bind(namespace, "v", el)}'
+            for at, el in enumerate(sig) if el is not Any
+        ]
+
+    def tablekey(self, sig: Tuple) -> Optional[Tuple]:
+        """Key to look up calls fitting ``sig`` by, if they can be
+        (see ``keysource()``)."""
+        return sig if all(map(self.concrete, sig)) else None
+
+    def keysource(self, arity: int) -> str:
+        return 'args'
+
+    def prelude(self, arity: int, fallback: str) -> List[str]:
+        "Source preparing arguments for ``conditions()``."
+        return [
+            'try:',
+            '    hash(args)',
+            'except TypeError:  # compared like match() does',
+            f'    {fallback}',
+        ]
+
+    def arity_source(self, arity: int, namespace: Dict[str, Any],
+                     fallback: str) -> List[str]:
+        """Source dispatching calls with ``arity`` arguments, running
+        the statement ``fallback`` for calls that it can't."""
+        if not self.compilable(arity):
+            return [fallback]
+
+        names = ', '.join(f'a{at}' for at in range(arity))
+        lines = self.prelude(arity, fallback)
+        keyed: List[Tuple[Tuple, List[str], Callable]] = []
+
+        def flush() -> None:
+            if len(keyed) > self.inline_below:
+                table: Dict[Any, Callable] = {}
+                for sig, _, handler in keyed:
+                    table.setdefault(self.tablekey(sig), spreading(handler))
+                lines.extend((
+                    f'handler = {bind(namespace, "t", table)}'
+                    f'.get({self.keysource(arity)})',
+                    'if handler is not None:',
+                    f'    return handler({names})',
+                ))
+            else:
+                for sig, conds, handler in keyed:
+                    lines.extend(self.case_source(conds, handler, arity,
+                                                  namespace))
+            keyed.clear()
+
+        for sig, conds, handler in self.rules(arity, namespace):
+            if self.tablekey(sig) is not None:
+                keyed.append((sig, conds, handler))
+            else:
+                flush()
+                lines.extend(
+                    self.case_source(conds, handler, arity, namespace))
+        flush()
+        return lines + [fallback]
+
+    def case_source(self, conds: List[str], handler: Callable, arity: int,
+                    namespace: Dict[str, Any]) -> List[str]:
+        names = ', '.join(f'a{at}' for at in range(arity))
+        inlined = namespace.setdefault('inlined', [self])
+        if (isinstance(handler, Matcher)
+                and not isinstance(handler, AsyncMatcher)
+                and handler not in inlined):
+            inlined.append(handler)
+            inner = bind(namespace, 'm', handler)
+            body = handler.arity_source(arity, namespace,
+                                        f'return {inner}({names})')
+        else:
+            body = [f'return {bind(namespace, "h", spreading(handler))}'
+                    f'({names})']
+        if not conds:
+            return body
+        return [f'if {" and ".join(conds)}:'] + ['    ' + l for l in body]
+
+    def dispatch_source(self, namespace: Dict[str, Any]) -> str:
+        """Generates source for ``compile()``, adding the values it
+        refers to to ``namespace``.
+
+        """
+        matcher = bind(namespace, 'm', self)
+        namespace['inlined'] = [self]
+        arities = sorted({
+            len(sig)
+            for sig in map(box, self) if type(sig) is tuple
+            and not any(el is ... for el in sig) and self.compilable(len(sig))
+        })
+        body = ['n = len(args)']
+        for branch, arity in zip(['if'] + ['elif'] * len(arities), arities):
+            names = ', '.join(f'a{at}' for at in range(arity))
+            lines = [f'[{names}] = args'] + self.arity_source(
+                arity, namespace, f'return {matcher}({names})')
+            body += [f'{branch} n == {arity}:'] + ['    ' + l for l in lines]
+
+        inlined = namespace.pop('inlined')
+        self._inlined = [(inner, inner._generation) for inner in inlined]
+        outdated = ' or '.join(f'{bind(namespace, "m", inner)}._generation '
+                               f'!= {inner._generation}'
+                               for inner in inlined)
+        profiled = ' or '.join(f'{bind(namespace, "m", inner)}._profile '
+                               'is not None' for inner in inlined)
+        return '\n'.join([
+            'def dispatch(*args, **kwargs):',
+            f'    if {outdated}:',
+            f'        return {matcher}.compile()(*args, **kwargs)',
+            f'    if kwargs or {profiled}:',
+            f'        return {matcher}(*args, **kwargs)',
+            '    if len(args) == 1 and type(args[0]) in LISTLIKE:',
+            f'        return {matcher}(*args)',
+        ] + ['    ' + line for line in body] + [
+            f'    return {matcher}(*args)',
+        ])
+
+    def _reinvokers(self) -> None:
+        "Builds call adapters for all handlers."
+        self._invokers, self._memos = {}, {}
+        for pattern, handler in self.items():
+            self._reinvoke(pattern, handler)
+
+    def _reinvoke(self, pattern: Any, handler: Callable) -> None:
+        """Builds the call adapter for the handler of ``pattern``, and a
+        `Memo` for its results if it is `Pure`."""
+        self._memos.pop(pattern, None)
+        if isinstance(handler, Pure):
+            self._memos[pattern] = Memo(handler.maxsize)
+            handler = handler.func
+        self._invokers[pattern] = self.invoker(handler)
+
+    def __setitem__(self, key: Any, handler: Callable) -> None:
+        known = key in self
+        super(Matcher, self).__setitem__(key, handler)
+        self._reinvoke(key, handler)
+        if not known:  # (indexes only depend on the patterns)
+            self._invalidate()
+        else:
+            self._forget()
+            self._outdate()
+
+    def __delitem__(self, key: Any) -> None:
+        super(Matcher, self).__delitem__(key)
+        del self._invokers[key]
+        self._memos.pop(key, None)
+        self._invalidate()
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        super(Matcher, self).update(*args, **kwargs)
+        self._reinvokers()
+        self._invalidate()
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, *args: Any) -> Any:
+        handler = super(Matcher, self).pop(*args)
+        self._invokers.pop(args[0], None)
+        self._memos.pop(args[0], None)
+        self._invalidate()
+        return handler
+
+    def popitem(self) -> Tuple[Any, Any]:
+        key, handler = super(Matcher, self).popitem()
+        del self._invokers[key]
+        self._memos.pop(key, None)
+        self._invalidate()
+        return key, handler
+
+    def clear(self) -> None:
+        super(Matcher, self).clear()
+        self._invokers.clear()
+        self._memos.clear()
+        self._invalidate()
+
+    def __ior__(  # type: ignore[misc]  # (dict's __or__ gives a dict)
+            self, other: Any) -> 'Matcher':
+        self.update(other)
+        return self
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        bound = {
+            pattern
+            for pattern, name in self.__cases__
+            if self.get(pattern) == getattr(self, name)
+        }  # (bound again by __init__)
+        settings = {
+            name: value
+            for name, value in vars(self).items() if not name.startswith('_')
+        }  # (e.g. `cache_size` set on the instance)
+        return (self.__class__, ({
+            pattern: handler
+            for pattern, handler in self.items() if pattern not in bound
+        }, ), settings or None)
+
+    def pmap(self,
+             iterable: Iterable[MatchArgT],
+             workers: Optional[int] = None,
+             chunksize: Optional[int] = None) -> List[MatchRetT]:
+        """Like ``map()``, but dispatches chunks of ``chunksize`` items
+        in parallel in ``workers`` processes. Results come in order.
+
+        The matcher is pickled and sent to each worker once, so its
+        handlers have to be picklable, i.e. importable functions,
+        methods declared with ``@case`` or other matchers.
+
+        """
+        try:
+            payload = pickle.dumps(self)
+        except (pickle.PicklingError, AttributeError, TypeError) as exc:
+            raise TypeError(f'{self!r} can not be sent to other processes, '
+                            'its handlers have to be importable') from exc
+        items = list(iterable)
+        workers = workers or os.cpu_count() or 1
+        if chunksize is None:
+            chunksize = max(1, math.ceil(len(items) / (workers * 4)))
+        chunks = [
+            items[at:at + chunksize] for at in range(0, len(items), chunksize)
+        ]
+        with ProcessPoolExecutor(workers,
+                                 initializer=_install_worker,
+                                 initargs=(payload, )) as pool:
+            return [
+                result for chunk in pool.map(_worker_map, chunks)
+                for result in chunk
+            ]
 
     @staticmethod
     def signature(
@@ -200,42 +1754,281 @@ class Matcher(dict, Generic[MatchArgT, MatchRetT]):
         self[Miss] = handler
         return handler
 
+    def map(self, iterable: Iterable[MatchArgT]) -> List[MatchRetT]:
+        """Like ``[self(value) for value in iterable]``, see
+        ``starmap()``."""
+        items = list(iterable)
+        return self._grouped([(item, ) for item in items], items)
+
+    def starmap(self, iterable: Iterable[Sequence]) -> List[MatchRetT]:
+        """Like ``[self(*args) for args in iterable]``, but resolves
+        the handler once per group of calls with the same signature
+        and then calls it for the whole group.
+
+        Results come in the same order as the calls, but handlers are
+        called group by group. Handlers marked with ``batch()`` are
+        called once per group instead, with a list of its items.
+        ``Mismatch`` is raised before any handler is called.
+
+        """
+        items = list(iterable)
+        return self._grouped([tuple(args) for args in items], items)
+
+    def stream(self, iterable: Iterable[MatchArgT]) -> Iterator[Any]:
+        """Lazily dispatches each item of ``iterable``, pulling the
+        next item only when the previous results have been consumed.
+        Handlers that return generators have what they yield passed on
+        in their place, so that items can fan out into any number of
+        results (or none).
+
+        """
+        for item in iterable:
+            result = self(item)
+            if isgenerator(result):
+                yield from result
+            else:
+                yield result
+
+    def groupkey(self, args: Tuple) -> Any:
+        """Stands in for the call signature of ``args``, see ``map()``.
+        Calls with equal keys must resolve to the same pattern, so by
+        default arguments are told apart by type too, also inside
+        containers (see ``typed()``). Subclasses may key on less."""
+        return tuple(map(typed, args))
+
+    def _grouped(self, calls: List[Tuple], items: List[Any]) -> List[Any]:
+        if self._profile is not None:
+            return [self(*args) for args in calls]
+
+        groups: Dict[Any, List[int]] = {}
+        unhashable = []
+        for at, args in enumerate(calls):
+            try:
+                groups.setdefault(self.groupkey(args), []).append(at)
+            except TypeError:
+                unhashable.append([at])
+
+        resolved = []
+        for group in (*groups.values(), *unhashable):
+            args = calls[group[0]]
+            key = self.resolve(self.callsign(args, {}))
+            resolved.append((group, key, self._invoker(key, args, {})))
+
+        results: List[Any] = [None] * len(calls)
+        for group, key, call in resolved:
+            if getattr(self[key], '__batch__', False):
+                batch = list(self[key]([items[at] for at in group]))
+                if len(batch) != len(group):
+                    raise ValueError(f'Batch handler for {key} returned '
+                                     f'{len(batch)} results for '
+                                     f'{len(group)} items')
+                for at, result in zip(group, batch):
+                    results[at] = result
+            elif key in self._memos:
+                for at in group:
+                    results[at] = self._memoised(calls[at], {}, key)
+            else:
+                for at in group:
+                    results[at] = call(calls[at], {})
+        return results
+
     def match(self, args: Sequence, kwargs: Mapping) -> Callable:
-        cand = self.callsign(args, kwargs)
-        key = matches(cand, tuple(self))
+        key = self.resolve_keywords(args, kwargs) if kwargs else Miss
+        if key is Miss:
+            key = self.resolve(self.callsign(args, kwargs))
         return self[key]
 
+    def resolve_keywords(self, args: Sequence, kwargs: Mapping) -> Any:
+        """Finds the first pattern ending with `Keywords` that a call
+        fits, or ``Miss``. Only patterns for the same keyword names
+        are tried.
+
+        """
+        if self._keywords is None:
+            self._keywords = {}
+            for pattern in self:
+                sig = box(pattern)
+                if type(sig) is tuple and sig and isinstance(
+                        sig[-1], Keywords):
+                    self._keywords.setdefault(sig[-1].names, []).append(
+                        (pattern, sig[:-1], sig[-1]))
+
+        cases = self._keywords.get(frozenset(kwargs))
+        if cases:
+            cand = box(self.callsign(args, {}))
+            for pattern, positional, keywords in cases:
+                if fits(cand, positional, self.matchfn) and all(
+                        against is Any or self.matchfn(
+                            unbox(self.callsign((kwargs[name], ), {})),
+                            against)
+                        for name, against in keywords):
+                    return pattern
+        return Miss
+
+    def resolve(self, cand: Sequence) -> Any:
+        """Finds the pattern for call signature ``cand``, or ``Miss``.
+
+        Remembers up to ``cache_size`` signatures, including the ones
+        that missed.
+
+        """
+        if not self.cache_size:
+            return self._resolve(cand)
+
+        cache = self._cache
+        try:
+            key = cache[cand]
+        except KeyError:
+            pass
+        except TypeError:  # unhashable signature, can't be cached
+            return self._resolve(cand)
+        else:
+            cache.move_to_end(cand)
+            self._hits += 1
+            return key
+
+        self._misses += 1
+        key = cache[cand] = self._resolve(cand)
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return key
+
+    def _resolve(self, cand: Sequence) -> Any:
+        return self.lookup(cand)
+
+    @staticmethod
+    def concrete(el: Any) -> bool:
+        "Pattern elements that can be looked up by hash."
+        return el is not Any and el is not ... and not isinstance(
+            el, Predicate)
+
+    def lookup(self, cand: Sequence) -> Any:
+        "Finds the pattern matching call signature ``cand``, or ``Miss``."
+        if self._index is None:
+            self._index = DispatchIndex(self, self.concrete)
+        return self._index.lookup(cand)
+
     def invoke(self, handler: Callable, args: Sequence, kwargs: Mapping):
-        return handler() if lang.arity(handler) == 0 else handler(
-            *box(unbox(args)), **kwargs)
+        return self.invoker(handler)(args, kwargs)
+
+    def _invoker(self, key: Any, args: Sequence,
+                 kwargs: Mapping) -> Invoker:
+        try:
+            return self._invokers[key]
+        except KeyError:  # (only `Miss` can be absent)
+            raise Mismatch(f"Mismatched ({args!r}, {kwargs!r})")
 
     def __call__(self, *args: Any, **kwargs: Any) -> MatchRetT:
-        for cb, deco_case in ((getattr(self, name), getattr(self,
-                                                            name).__case__)
-                              for name in dir(self)
-                              if hasattr(getattr(self, name), '__case__')):
-            self[deco_case] = cb
+        if self._profile is not None:
+            return self._profiled(args, kwargs)
+        if self._memos:
+            return self._memoised(args, kwargs)
+        if kwargs:
+            key = self.resolve_keywords(args, kwargs)
+            if key is Miss:
+                key = self.resolve(self.callsign(args, kwargs))
+        else:
+            key = self.resolve(self.callsign(args, kwargs))
+        return self._invoker(key, args, kwargs)(args, kwargs)
+
+    def _memoised(self,
+                  args: Sequence,
+                  kwargs: Mapping,
+                  pattern: Any = NotIndexed) -> MatchRetT:
+        """Calls the matcher, looking the call up among the results of
+        pure handlers first, so a hit skips both matching and the
+        handler. ``pattern`` is the one the call resolves to, if known.
 
+        """
         try:
-            handler = self.match(args, kwargs)
-            return self.invoke(handler, args, kwargs)
-        except KeyError:
-            try:
-                return self.invoke(self[Miss], args, kwargs)
-            except KeyError:
-                raise Mismatch(f"Mismatched ({args!r}, {kwargs!r})")
+            key: Optional[Tuple] = memokey(args, kwargs)
+        except TypeError:  # no hashable stand-in, can't be remembered
+            key = None
+        else:
+            memo = self._memoed.get(cast(Tuple, key))
+            if memo is not None:
+                return memo.recall(cast(Tuple, key))
+
+        if pattern is NotIndexed:  # (not resolved yet)
+            pattern = self.resolve_keywords(args, kwargs) if kwargs else Miss
+            if pattern is Miss:
+                pattern = self.resolve(self.callsign(args, kwargs))
+        result = self._invoker(pattern, args, kwargs)(args, kwargs)
+        memo = self._memos.get(pattern)
+        if (memo is not None and key is not None
+                and not (isawaitable(result) or isgenerator(result))):
+            memo.remember(key, result, self._memoed)
+        return result
+
+    def memo_info(self) -> Dict[Any, CacheInfo]:
+        """Statistics for the results remembered for each pattern with
+        a pure handler (see ``pure()``)."""
+        return {pattern: memo.info() for pattern, memo in self._memos.items()}
+
+    def instrument(self, enabled: bool = True) -> Optional[Profile]:
+        """Turns gathering of dispatch statistics on (starting over
+        from zero) or off. Returns the new `Profile`, if any.
+
+        """
+        self._profile = Profile() if enabled else None
+        return self._profile
+
+    def stats(self) -> Dict[str, Any]:
+        """Dispatch statistics as a ``dict``: number of ``calls``,
+        ``misses`` and ``hits`` per pattern, and ``seconds`` spent
+        computing call signatures, matching and in handlers. Empty if
+        the matcher isn't instrumented.
+
+        """
+        return {} if self._profile is None else self._profile.asdict()
+
+    def _profiled(self, args: Sequence, kwargs: Mapping) -> MatchRetT:
+        profile, clock = cast(Profile, self._profile), time.perf_counter
+        began = clock()
+        cand = self.callsign(args, kwargs)
+        signed = clock()
+        key = self.resolve_keywords(args, kwargs) if kwargs else Miss
+        if key is Miss:
+            key = self.resolve(cand)
+        matched = clock()
+
+        profile.calls += 1
+        profile.seconds['callsign'] += signed - began
+        profile.seconds['match'] += matched - signed
+        if key is Miss:
+            profile.misses += 1
+        else:
+            profile.hits[key] += 1
+
+        try:
+            if key in self._memos:
+                return self._memoised(args, kwargs, key)
+            return self._invoker(key, args, kwargs)(args, kwargs)
+        finally:
+            profile.seconds['handler'] += clock() - matched
 
     def explain(self, out=False):  # pragma: nocov
         """Development convenience tool -
 
         creates a summary of what patterns matcher object contain
-        and which functions the matchings map to.
+        and which functions the matchings map to. If the matcher is
+        instrumented, also how often each pattern matched and where
+        time was spent.
 
         """
+        profile = self._profile
         lines = (f"- A {self.__class__.__name__}", )
         for matching in self:
             fn = self[matching]
-            lines = (*lines, f"    - {matching!r} : {kind.nick(fn)}")
+            hits = ('' if profile is None else
+                    f" ({profile.hits[matching]} hits)")
+            lines = (*lines, f"    - {matching!r} : {kind.nick(fn)}{hits}")
+
+        if profile is not None:
+            spent = ', '.join(f"{step} {seconds:.6f}s"
+                              for step, seconds in profile.seconds.items())
+            lines = (*lines, f"  {profile.calls} calls, "
+                     f"{profile.misses} misses, {spent}")
 
         text = os.linesep.join(lines)
         if out:
@@ -281,6 +2074,18 @@ class TypeMatcher(Matcher):
     <TypeMatcher: (int)->λ, (str)->λ >
     >>>
 
+    Arguments that only match as subtypes go to the most specific
+    pattern, whatever order the patterns were registered in:
+
+    >>> class Base: pass
+    >>> class Derived(Base): pass
+    >>> by_mro:Matcher[Base, str] = TypeMatcher({
+    ...    object: lambda x: 'object',
+    ...    Base: lambda x: 'base'})
+    >>> by_mro(Derived())
+    'base'
+    >>>
+
     You can also subclass type matchers and use a decorator to declare
     cases as methods:
 
@@ -307,24 +2112,266 @@ class TypeMatcher(Matcher):
     'One float'
     >>>
 
+    Call signatures are resolved once and then remembered, up to
+    ``cache_size`` of them:
+
+    >>> my_num_matcher(2)
+    'One integer'
+    >>> my_num_matcher.cache_info()
+    CacheInfo(hits=1, misses=3, maxsize=1024, currsize=3)
+
+    Calls with more than ``compact_above`` arguments are described by
+    run-length encoded signatures (see ``kind.xrruns()``). Setting
+    ``sample`` to a number of arguments makes the matcher *assume*
+    that all of them have the same type when that many evenly spread
+    samples do.
+
     """
+    cache_size = 1024
+    compact_above = 64
+    matchfn = staticmethod(match_subtype)
+    sample: Optional[int] = None
+    adaptive = False
+    adapt_every = 256
+    _token: Any  # (ABC registrations the signature cache is as of)
+
     @staticmethod
     def signature(
             handler: Callable) -> Tuple[Callable[..., Any], Sequence[Any]]:
         return cast(Tuple[Callable[..., Any], Sequence[Any]],
                     unbox(primparams(handler)))
 
-    def match(self, args: Sequence, kwargs: Mapping) -> Callable:
-        try:
-            return super(TypeMatcher, self).match(args, kwargs)
-        except KeyError:
-            cand = self.callsign(args, kwargs)
-            key = matches(cand, tuple(self), match_subtype)
-            return self[key]
+    def case(self,
+             handler: Optional[Callable] = None,
+             *,
+             pure: bool = False,
+             maxsize: int = 128) -> Callable:
+        """Decorator adding a handler for the types in its signature.
+        Raises `Ambiguous` if it overlaps another pattern without being
+        more or less specific. Use as ``@case(pure=True)`` to remember
+        results, see ``pure()``."""
+        if handler is None:
+            return partial(self.case, pure=pure, maxsize=maxsize)
+        dispatch = self.signature(handler)
+        self._raise_on_conflict(dispatch)
+        self._raise_on_ambiguity(dispatch)
+        self._raise_on_uncheckable(dispatch)
+        self[dispatch] = purify(handler, pure, maxsize)
+        return handler
+
+    @staticmethod
+    def _raise_on_uncheckable(dispatch: Any) -> None:
+        for el in box(dispatch):
+            origin = get_origin(el)
+            if (get_args(el) and isinstance(origin, type)
+                    and not issubclass(list, origin)
+                    and not issubclass(tuple, origin)):
+                raise TypeError(f'Can only dispatch on generic sequences, '
+                                f'not {el}')
+            if (getattr(el, '_is_protocol', False)
+                    and not getattr(el, '_is_runtime_protocol', False)):
+                raise TypeError(f'Protocol {el} needs to be '
+                                '@runtime_checkable to dispatch on')
+
+    def _raise_on_ambiguity(self, dispatch: Any) -> None:
+        pattern = box(dispatch)
+        if any(el is ... for el in pattern):
+            return
+        for other in map(box, self):
+            if len(other) != len(pattern) or any(el is ... for el in other):
+                continue
+            order = set(map(specificity, pattern, other))
+            if None not in order and {-1, 1} <= order:
+                raise Ambiguous(f'Pattern {dispatch!r} is ambiguous with '
+                                f'pattern {unbox(other)!r}')
+
+    def _resolve(self, cand: Sequence) -> Any:
+        key = self.lookup(cand)
+        if key is Miss or not all(map(self.concrete, box(key))):
+            # (a pattern with `Any` or `...` may not be the most
+            # specific one that fits)
+            return self.most_specific(cand)
+        return key
+
+    def resolve(self, cand: Sequence) -> Any:
+        self._current()
+        key = super().resolve(cand)
+        if self.adaptive and key is not Miss:
+            self._heat(key)
+        return key
+
+    def _heat(self, pattern: Any) -> None:
+        """Counts a hit for ``pattern``, cached or not. Every
+        ``adapt_every`` hits the disjoint patterns are re-sorted."""
+        self._hot[pattern] += 1
+        self._probes += 1
+        if self._probes % self.adapt_every == 0:
+            self._solos().sort(key=self._hot.__getitem__, reverse=True)
+
+    def _current(self) -> None:
+        "Forgets what classes registered with ABC's since have outdated."
+        token = get_cache_token()
+        if token != self._token:
+            self._token = token
+            self._cache.clear()
+            self._forget()
+
+    def _memoised(self,
+                  args: Sequence,
+                  kwargs: Mapping,
+                  pattern: Any = NotIndexed) -> Any:
+        self._current()
+        return super()._memoised(args, kwargs, pattern)
+
+    def _invalidate(self) -> None:
+        super()._invalidate()
+        self._token = get_cache_token()
+        self._hot: Counter = Counter()
+        self._probes = 0
+        self._solo: Optional[List[Any]] = None
+
+    def _solos(self) -> List[Any]:
+        "Patterns disjoint from all others, hottest first."
+        if self._solo is None:
+            patterns = [pattern for pattern in self if pattern is not Miss]
+            self._solo = [
+                pattern for pattern in patterns
+                if all(other is pattern or disjoint(pattern, other)
+                       for other in patterns)
+            ]
+        return self._solo
+
+    def _probe(self, cand: Sequence) -> Any:
+        """Tries the disjoint patterns in order of observed hits (see
+        ``resolve()``)."""
+        for pattern in self._solos():
+            if fits(cand, pattern, match_subtype):
+                return pattern
+        return Miss
+
+    def most_specific(self, cand: Sequence) -> Any:
+        """Resolves ``cand`` to the pattern that fits it as subtypes,
+        or ``Miss``.
+
+        When several patterns fit, the one closest in the MRO of each
+        argument wins (see ``distance()``). Patterns with ``...`` are
+        only considered if no fixed-length one fits. Remaining ties go
+        to the first registered pattern.
+
+        With ``adaptive`` set, patterns that provably can't overlap
+        any other (see ``disjoint()``) are tried first, most hit
+        first, for candidates where that proof holds.
+
+        """
+        tried: Set[Any] = set()
+        if (self.adaptive and not isinstance(cand, Runs)
+                and all(map(linear, box(cand)))):
+            found = self._probe(cand)
+            if found is not Miss:
+                return found
+            tried = set(self._solos())
+        fitting = [
+            pattern for pattern in self if pattern is not Miss
+            and pattern not in tried and fits(cand, pattern, match_subtype)
+        ]
+        if isinstance(cand, Runs):
+            return fitting[0] if fitting else Miss
+
+        sig = box(cand)
+        ranked = [(tuple(map(distance, sig, box(pattern))), pattern)
+                  for pattern in fitting
+                  if not any(el is ... for el in box(pattern))]
+        for ranks, pattern in ranked:
+            if not any(dominates(others, ranks) for others, _ in ranked):
+                return pattern
+
+        return fitting[0] if fitting else Miss
 
     def callsign(self, args: Sequence[MatchArgT],
                  kwargs: Mapping[Any, Any]) -> Sequence:
-        return cast(Sequence[Any], xrtype(resolve_pattern(args, kwargs)))
+        params = resolve_pattern(args, kwargs)
+        if type(params) in (tuple, list):
+            values = cast(Sequence[Any], params)
+            if len(values) > self.compact_above:
+                return cast(Sequence[Any], xrruns(values, self.sample))
+        return cast(Sequence[Any], xrtype(params))
+
+    @staticmethod
+    def typetest(cls: Any, at: int) -> Optional[str]:
+        """Source for testing if argument number ``at`` has the type
+        ``cls`` as described by ``xrtype()``, or ``None`` if ``cls``
+        can't be tested for directly.
+
+        """
+        described = isinstance(cls, type) and described_by_class(cls)
+        if described is False:
+            return None
+        return '' if described else f"not hasattr(a{at}, '__name__')"
+
+    def groupkey(self, args: Tuple) -> Any:
+        "Stands in for the call signature of ``args``, see ``map()``."
+        if len(args) <= self.compact_above:
+            for arg in args:
+                cls: type = type(arg)
+                described = described_by_class(cls)
+                if not (described or described is None
+                        and not hasattr(arg, '__name__')):
+                    break
+            else:  # the types are the signature
+                return tuple(map(type, args))
+        return self.callsign(args, {})
+
+    def compilable(self, arity: int) -> bool:
+        return 0 < arity <= self.compact_above
+
+    def conditions(self, sig: Tuple,
+                   namespace: Dict[str, Any]) -> Optional[List[str]]:
+        "Source testing if arguments fit ``sig`` by their types."
+        if any(el is Any for el in sig) and self._outranked(sig):
+            return None  # (see `_resolve()`)
+        conds = []
+        for at, el in enumerate(sig):
+            if el is Any:
+                continue
+            test = self.typetest(el, at)
+            if test is None:
+                return None
+            conds.append(f't{at} is {bind(namespace, "c", el)}')
+            if test:
+                conds.append(test)
+        return conds
+
+    def _outranked(self, sig: Tuple) -> bool:
+        """Could another pattern win over ``sig`` for calls of exactly
+        its types (see ``most_specific()``)? Fixed-length ones can that
+        may fit the same calls and were registered before it, or after
+        it and have the same type wherever it has one."""
+        later = False
+        for pattern in self:
+            other = box(pattern)
+            if other == sig:
+                later = True
+            elif (pattern is Miss or any(el is ... for el in other)
+                  or disjoint(sig, other)):
+                continue
+            elif not later or all(el is Any or el == against
+                                  for el, against in zip(sig, other)):
+                return True
+        return False
+
+    def tablekey(self, sig: Tuple) -> Optional[Tuple]:
+        return sig if all(
+            el is not Any and self.typetest(el, at) == ''
+            for at, el in enumerate(sig)) else None
+
+    def keysource(self, arity: int) -> str:
+        return '(' + ''.join(f't{at}, ' for at in range(arity)) + ')'
+
+    def prelude(self, arity: int, fallback: str) -> List[str]:
+        return [
+            ', '.join(f't{at}' for at in range(arity)) + ' = ' +
+            ', '.join(f'type(a{at})' for at in range(arity))
+        ]
 
     def __repr__(self) -> str:
         nickfunc = kind.typenick  # type: ignore[attr-defined]
@@ -390,13 +2437,15 @@ class ValueMatcher(Matcher):
     def case(self, *params: Any, **opts: Any) -> Callable:
         """Decorator to add a function. The types of the parameters. The types
         that will be matched is taken from the signature of the
-        decorated function.
+        decorated function. With ``pure=True`` (and optionally
+        ``maxsize``), results are remembered, see ``pure()``.
 
         """
         def wrap(handler, *xparams, **xopts):
             dispatch = unbox(params)
             self._raise_on_conflict(dispatch)
-            self[dispatch] = handler
+            self[dispatch] = purify(handler, opts.get('pure', False),
+                                    opts.get('maxsize', 128))
             return handler
 
         return wrap
@@ -406,18 +2455,510 @@ class ValueMatcher(Matcher):
         return f"<ValueMatcher: {matchreps} >"
 
 
-def type_case(func: TypeMatcher) -> Callable:
-    func.__case__ = cast(DecoratorCases, TypeMatcher.signature(func)[1:])
-    return func
+class Fields(tuple):
+    """Frozen mapping pattern for `StructMatcher`, as ``(key, pattern)``
+    pairs. See ``freeze()``."""
+    def __repr__(self) -> str:
+        return '{' + ', '.join(f'{key!r}: {pattern!r}'
+                               for key, pattern in self) + '}'
+
+
+def freeze(pattern: Any) -> Any:
+    """Makes a structural pattern hashable, turning mappings into
+    `Fields` sorted by key (so they equal whatever order they were
+    written in) and lists into tuples.
+
+    >>> freeze({'type': 'order', 'items': [(str, int), ...]})
+    {'items': ((<class 'str'>, <class 'int'>), Ellipsis), 'type': 'order'}
+
+    """
+    if isinstance(pattern, abc.Mapping):
+        fields = [(key, freeze(sub)) for key, sub in pattern.items()]
+        try:
+            fields.sort(key=lambda field: field[0])
+        except TypeError:  # keys of different kinds, e.g. str and int
+            fields.sort(key=lambda field: (type(field[0]).__name__,
+                                           repr(field[0])))
+        return Fields(fields)
+    elif type(pattern) in (list, tuple):
+        frozen = tuple(map(freeze, pattern))
+        unchanged = type(pattern) is tuple and all(
+            map(lambda a, b: a is b, frozen, pattern))
+        return pattern if unchanged else frozen  # (e.g. keeps `Miss`)
+    return pattern
+
+
+Shape = Callable[[Any], bool]
+
+
+def shape(pattern: Any) -> Shape:
+    """Compiles a (frozen) structural pattern to a predicate. It checks
+    values from the outside in and stops at the first mismatch.
+
+    - ``Any`` matches anything.
+    - Classes match their instances.
+    - `Predicate`'s, such as `Range`, match values they accept.
+    - `Fields` match mappings having (at least) those keys, with
+      values matching their patterns.
+    - Tuples match lists or tuples, element by element. A trailing
+      ``...`` repeats the element before it any number of times, like
+      in ``Tuple[int, ...]``.
+    - Other values match values equal to them.
+
+    >>> order = shape(freeze({'type': 'order', 'items': [(str, int), ...]}))
+    >>> order({'type': 'order', 'items': [['apple', 2], ['pear', 1]]})
+    True
+    >>> order({'type': 'order', 'items': [['apple', 'many']]})
+    False
+
+    """
+    if pattern is Any:
+        return lambda value: True
+
+    elif isinstance(pattern, Predicate):
+        return pattern
+
+    elif isinstance(pattern, type):
+        return lambda value: isinstance(value, pattern)
+
+    elif isinstance(pattern, Fields):
+        fields = [(key, shape(sub)) for key, sub in pattern]
+
+        def mapping(value: Any) -> bool:
+            if type(value) is not dict and not isinstance(value, abc.Mapping):
+                return False
+            for key, fits in fields:
+                if key not in value or not fits(value[key]):
+                    return False
+            return True
+
+        return mapping
+
+    elif type(pattern) is tuple:
+        if ... in pattern[:-1] or pattern[:1] == (..., ):
+            raise ValueError(f'Pattern {pattern} can only have `...` last, '
+                             'after an element to repeat')
+        repeat = shape(pattern[-2]) if pattern[-1:] == (..., ) else None
+        fixed = [shape(sub) for sub in pattern[:-2 if repeat else None]]
+
+        def sequence(value: Any) -> bool:
+            if type(value) not in (list, tuple):
+                return False
+            elif len(value) != len(fixed) and not (
+                    repeat and len(value) > len(fixed)):
+                return False
+            for sub, fits in zip(value, fixed):
+                if not fits(sub):
+                    return False
+            if repeat:
+                for at in range(len(fixed), len(value)):
+                    if not repeat(value[at]):
+                        return False
+            return True
+
+        return sequence
+
+    return lambda value: value == pattern
+
+
+def verbatim(handler: Callable) -> Invoker:
+    "Call adapter passing arguments on as they are, without spreading."
+    return lambda args, kwargs: handler(*args, **kwargs)
+
+
+class StructMatcher(Matcher):
+    """Matcher for nested structures, e.g. decoded JSON documents,
+    see ``shape()``. Cases are tried in the order they were added.
+    Handlers get the matched structure as their only argument.
+
+    >>> router = StructMatcher()
+    >>> @router.case({'type': 'order', 'items': [(str, int), ...]})
+    ... def order(event):
+    ...     return sum(count for _, count in event['items'])
+    >>> @router.case({'type': Any})
+    ... def other(event):
+    ...     return event['type']
+    >>> router({'type': 'order', 'items': [('apple', 2), ('pear', 1)]})
+    3
+    >>> router({'type': 'refund', 'items': []})
+    'refund'
+
+    """
+    invoker = staticmethod(verbatim)
+    _shapes: Optional[List[Tuple[Any, Shape]]]
+
+    def __init__(self, cases: Any = (), **kwargs: Any) -> None:
+        pairs = cases.items() if isinstance(cases, abc.Mapping) else cases
+        super(StructMatcher, self).__init__(
+            {freeze(pattern): handler
+             for pattern, handler in pairs}, **kwargs)
+
+    def __setitem__(self, key: Any, handler: Callable) -> None:
+        super(StructMatcher, self).__setitem__(freeze(key), handler)
+
+    def _invalidate(self) -> None:
+        super(StructMatcher, self)._invalidate()
+        self._shapes = None
+
+    def case(self, pattern: Any) -> Callable:
+        "Decorator adding a handler for values matching ``pattern``."
+        def wrap(handler: Callable) -> Callable:
+            frozen = freeze(pattern)
+            self._raise_on_conflict(frozen)
+            self[frozen] = handler
+            return handler
+
+        return wrap
+
+    def callsign(self, args: Sequence[MatchArgT],
+                 kwargs: Mapping[Any, Any]) -> Any:
+        return args[0] if len(args) == 1 else args
+
+    def compilable(self, arity: int) -> bool:
+        return False
+
+    def _resolve(self, cand: Any) -> Any:
+        if self._shapes is None:
+            self._shapes = [(pattern, shape(pattern)) for pattern in self
+                            if pattern is not Miss]
+        for pattern, fits in self._shapes:
+            if fits(cand):
+                return pattern
+        return Miss
+
+    def __repr__(self) -> str:
+        return f"<StructMatcher: {self.descresponses(repr)} >"
+
+
+def octets(frame: Any) -> memoryview:
+    """Zero-copy view of the bytes of ``frame`` (``bytes``,
+    ``bytearray``, ``memoryview`` or anything else with a contiguous
+    buffer), one byte per item."""
+    view = memoryview(frame)
+    return view if view.format == 'B' and view.ndim == 1 else view.cast('B')
+
+
+class At(namedtuple('At', 'offset expected mask')):
+    """Byte pattern for `BytesMatcher`, fitting frames with the bytes
+    ``expected`` at ``offset``. With a ``mask``, only the bits set in
+    it are compared.
+
+    >>> At(0, b'\\x01').fits(octets(b'\\x01\\x02'))
+    True
+    >>> At(1, b'\\x80', mask=b'\\x80').fits(octets(b'\\x01\\xf0'))
+    True
+
+    """
+    def __new__(cls,
+                offset: int,
+                expected: bytes,
+                mask: Optional[bytes] = None) -> 'At':
+        if offset < 0:
+            raise ValueError(f'Offset can not be negative, got {offset}')
+        if mask is not None and len(mask) != len(expected):
+            raise ValueError(f'Mask {mask!r} should be as long as '
+                             f'{expected!r}')
+        return super(At, cls).__new__(cls, offset, bytes(expected),
+                                      None if mask is None else bytes(mask))
+
+    @property
+    def probe(self) -> Tuple[int, int, Optional[int]]:
+        "Where to read a frame and how, for ``read()``."
+        return (self.offset, len(self.expected),
+                None if self.mask is None else int.from_bytes(
+                    self.mask, 'big'))
+
+    @property
+    def key(self) -> int:
+        "What ``read()`` gives for frames fitting this pattern."
+        expected = int.from_bytes(self.expected, 'big')
+        return (expected if self.mask is None else
+                expected & int.from_bytes(self.mask, 'big'))
+
+    @staticmethod
+    def read(view: memoryview, probe: Tuple[int, int,
+                                            Optional[int]]) -> Optional[int]:
+        """The (masked) bytes of ``view`` at ``probe`` as an integer, or
+        ``None`` if it is too short."""
+        offset, width, mask = probe
+        if offset + width > len(view):
+            return None
+        value = int.from_bytes(view[offset:offset + width], 'big')
+        return value if mask is None else value & mask
+
+    def fits(self, view: memoryview) -> bool:
+        return self.read(view, self.probe) == self.key
+
+
+def fields(pattern: Any) -> Tuple[At, ...]:
+    "The `At`'s of a `BytesMatcher` pattern."
+    return (pattern, ) if isinstance(pattern, At) else tuple(pattern)
+
+
+def viewing(handler: Callable) -> Invoker:
+    """Call adapter passing a zero-copy view of the first argument.
+    (`BytesMatcher` passes arguments to its ``Miss`` handler as they
+    are, see ``verbatim()``, as they need not be a frame.)"""
+    return lambda args, kwargs: handler(octets(args[0]), *args[1:], **kwargs)
+
+
+class BytesMatcher(Matcher):
+    """Matcher for binary frames, e.g. protocol messages, by the bytes
+    at fixed offsets in them. Patterns are an `At`, or a tuple of them
+    that all have to fit. Frames are read through memoryviews and
+    never copied, and handlers get a view of the whole frame (and any
+    further arguments as they are). Calls without a frame miss.
+
+    Cases are indexed by their first `At`, so a lookup reads each
+    distinct offset once, and only tries the rest of the cases that
+    fit there. The first registered fitting case wins.
+
+    >>> frames = BytesMatcher({
+    ...     At(0, b'\\x01'): lambda view: ('ping', len(view)),
+    ...     (At(0, b'\\x02'), At(1, b'\\x80', mask=b'\\x80')):
+    ...         lambda view: ('urgent', bytes(view[2:])),
+    ...     At(0, b'\\x02'): lambda view: ('data', bytes(view[2:])),
+    ... })
+    >>> frames(b'\\x01\\x00\\x00')
+    ('ping', 3)
+    >>> frames(bytearray(b'\\x02\\x81hi'))
+    ('urgent', b'hi')
+    >>> frames(memoryview(b'\\x02\\x01hi'))
+    ('data', b'hi')
+
+    """
+    invoker = staticmethod(viewing)
+    _probes: Optional[Dict[Tuple[int, int, Optional[int]],
+                           Dict[int, List[Tuple[int, Any, Tuple]]]]]
+    _always: List[Tuple[int, Any, Tuple]]
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super(BytesMatcher, self).__init__(*args, **kwargs)
+        for pattern in self:
+            if pattern is not Miss:
+                self._check(pattern)
+
+    def __setitem__(self, key: Any, handler: Callable) -> None:
+        if key is not Miss:
+            self._check(key)
+        super(BytesMatcher, self).__setitem__(key, handler)
+
+    def _reinvoke(self, pattern: Any, handler: Callable) -> None:
+        super(BytesMatcher, self)._reinvoke(pattern, handler)
+        if pattern is Miss:  # (arguments as they are, need not be a frame)
+            self._invokers[Miss] = verbatim(handler)
+
+    @staticmethod
+    def _check(pattern: Any) -> None:
+        if not all(isinstance(field, At) for field in fields(pattern)):
+            raise TypeError(f'Pattern {pattern!r} should be made of `At`s')
+
+    def _invalidate(self) -> None:
+        super(BytesMatcher, self)._invalidate()
+        self._probes = None
+
+    def case(self, *pattern: At) -> Callable:  # type: ignore[override]
+        "Decorator adding a handler for frames fitting all of ``pattern``."
+        def wrap(handler: Callable) -> Callable:
+            key = unbox(pattern)
+            self._raise_on_conflict(key)
+            self[key] = handler
+            return handler
+
+        return wrap
+
+    def callsign(self, args: Sequence[MatchArgT],
+                 kwargs: Mapping[Any, Any]) -> Any:
+        return args[0] if args else Miss
+
+    def compilable(self, arity: int) -> bool:
+        return False
+
+    def _build(self) -> Dict:
+        self._probes, self._always = {}, []
+        for order, pattern in enumerate(self):
+            if pattern is Miss:
+                continue
+            first, *rest = fields(pattern) or (None, )
+            if first is None:
+                self._always.append((order, pattern, ()))
+            else:
+                self._probes.setdefault(first.probe, {}).setdefault(
+                    first.key, []).append((order, pattern, tuple(rest)))
+        return self._probes
+
+    def _resolve(self, cand: Any) -> Any:
+        probes = self._build() if self._probes is None else self._probes
+        try:
+            view = octets(cand)
+        except TypeError:  # not a buffer, can't fit
+            return Miss
+
+        best: Indexed = NotIndexed
+        for probe, table in probes.items():
+            value = At.read(view, probe)
+            if value is None:  # (too short to fit)
+                continue
+            for order, pattern, rest in table.get(value, ()):
+                if order > best[0]:
+                    break
+                if all(field.fits(view) for field in rest):
+                    best = (order, pattern)
+                    break
+        for order, pattern, _ in self._always[:1]:
+            best = min(best, (order, pattern))
+        return best[1]
+
+    def __repr__(self) -> str:
+        return f"<BytesMatcher: {self.descresponses(repr)} >"
+
+
+async def _aiter(iterable: Union[Iterable, AsyncIterable]) -> AsyncIterator:
+    if isinstance(iterable, AsyncIterable):
+        async for item in iterable:
+            yield item
+    else:
+        for item in iterable:
+            yield item
+
+
+class AsyncMatcher(Matcher):
+    """Matcher that awaits what its handlers return, if awaitable.
+    Cases are resolved like for the synchronous matchers, as a plain
+    (cached) function call.
+
+    >>> class Fetch(AsyncTypeMatcher):
+    ...     @case
+    ...     async def many(self, n: int) -> str:
+    ...         return 'many'
+    ...     @case
+    ...     def one(self, s: str) -> str:
+    ...         return 'one'
+    >>> fetch = Fetch()
+    >>> asyncio.run(fetch(1)), asyncio.run(fetch('x'))
+    ('many', 'one')
+
+    """
+    async def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        result = super(AsyncMatcher, self).__call__(*args, **kwargs)
+        return await result if isawaitable(result) else result
+
+    def compile(self) -> Callable[..., Any]:
+        "Like ``Matcher.compile()``, but returns a coroutine function."
+        dispatch = super(AsyncMatcher, self).compile()
+
+        async def compiled(*args: Any, **kwargs: Any) -> Any:
+            result = dispatch(*args, **kwargs)
+            return await result if isawaitable(result) else result
+
+        return compiled
+
+    async def amap(self,
+                   iterable: Union[Iterable, AsyncIterable],
+                   limit: int = 16) -> AsyncIterator[Any]:
+        """Dispatches the items of a (possibly asynchronous)
+        ``iterable`` concurrently, at most ``limit`` at a time, and
+        yields their results in order. Items are only pulled from
+        ``iterable`` when there is room for them.
+
+        """
+        if limit < 1:
+            raise ValueError(f'limit must be at least 1, not {limit}')
+        pending: Deque[asyncio.Future] = deque()
+        try:
+            async for item in _aiter(iterable):
+                pending.append(asyncio.ensure_future(self(item)))
+                if len(pending) >= limit:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class AsyncTypeMatcher(AsyncMatcher, TypeMatcher):
+    "``TypeMatcher`` for coroutine handlers, see ``AsyncMatcher``."
+
+
+class AsyncValueMatcher(AsyncMatcher, ValueMatcher):
+    "``ValueMatcher`` for coroutine handlers, see ``AsyncMatcher``."
+
+
+def type_case(func: Optional[Callable] = None,
+              *,
+              pure: bool = False,
+              maxsize: int = 128) -> Callable:
+    if func is None:
+        return partial(type_case, pure=pure, maxsize=maxsize)
+    func.__case__ = cast(  # type: ignore[attr-defined]
+        DecoratorCases,
+        TypeMatcher.signature(func)[1:])
+    return purify(func, pure, maxsize)
 
 
 # Note: Guess based on what I personally use most.
 case = type_case
 
 
-def value_case(*values: Any) -> Callable:
+def batch(func: Callable) -> Callable:
+    """Marks a handler as taking a list of items at a time in
+    ``Matcher.map()`` and ``Matcher.starmap()``, returning a result
+    for each."""
+    func.__batch__ = True  # type: ignore[attr-defined]
+    return func
+
+
+class Pure:
+    """A handler marked with ``pure()``. Each matcher it is registered
+    with remembers its results separately, and calls ``func`` itself.
+
+    """
+    def __init__(self, func: Callable, maxsize: int) -> None:
+        self.func, self.maxsize = func, maxsize
+        update_wrapper(self, func)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self.func(*args, **kwargs)
+
+    def __get__(self, instance: Any, owner: Any = None) -> 'Pure':
+        if instance is None:
+            return self
+        return Pure(MethodType(self.func, instance), self.maxsize)
+
+
+def pure(func: Optional[Callable] = None,
+         *,
+         maxsize: int = 128) -> Callable:
+    """Marks a handler as a pure function of its arguments, so that
+    matchers remember its results for the ``maxsize`` most recently
+    used arguments. Calls with remembered arguments skip both matching
+    and the handler, see ``Matcher.memo_info()``. Awaitables and
+    generators aren't remembered. Gives a `Pure` wrapper, ``func`` is
+    left as it is.
+
+    >>> square = ValueMatcher({Any: pure(lambda n: n * n, maxsize=2)})
+    >>> square(3), square(3), square.memo_info()[Any]
+    (9, 9, CacheInfo(hits=1, misses=1, maxsize=2, currsize=1))
+
+    """
+    if func is None:
+        return partial(pure, maxsize=maxsize)
+    if maxsize < 1:
+        raise ValueError(f'maxsize must be at least 1, not {maxsize}')
+    return Pure(func, maxsize)
+
+
+def purify(func: Callable, marked: bool, maxsize: int) -> Callable:
+    "Marks ``func`` with ``pure()`` if ``marked``."
+    return pure(func, maxsize=maxsize) if marked else func
+
+
+def value_case(*values: Any, pure: bool = False,
+               maxsize: int = 128) -> Callable:
     def wrap(func: ValueMatcher):
-        func.__case__ = cast(DecoratorCases, values)
-        return func
+        func.__case__ = cast(  # type: ignore[attr-defined]
+            DecoratorCases, values)
+        return purify(func, pure, maxsize)
 
     return wrap
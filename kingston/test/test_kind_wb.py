@@ -57,6 +57,9 @@ def test_nick(param, expected) -> None:
                 ((), tuple),
                 ((1, 2), (int, int)),
                 ([1,2], [int, int]),
+                (Mapping, Mapping),
+                ((1, Mapping), (int, Mapping)),
+                (int, 'int'),
 )  # yapf: disable
 def test_xrtype(param, expected) -> None:
     "Should xrtype"
@@ -122,3 +125,29 @@ def only_kw(**kwargs):
 def test_primparams(fn, params) -> None:
     "Should convert function signatures to Python primitive(s)."
     assert kind.primparams(fn) == params
+
+
+@fixture.doctest(kind.xrruns)
+def test_doctest_xrruns(doctest):
+    assert doctest() == ''
+
+
+@fixture.params(
+    "value, sample",
+    ((1, 2, 3, 'x', 'y', 1), None),
+    ([1.0] * 100 + ['x'], None),
+    ((), None),
+    (tuple(range(100)), 10),
+)  # yapf: disable
+def test_xrruns_expands_to_xrtype(value, sample) -> None:
+    "Should describe the same types as `xrtype()`, only compacted."
+    runs = kind.xrruns(value, sample)
+    assert len(runs) == len(value)
+    assert runs.expand() == kind.xrtype(value) or not value
+
+
+def test_xrruns_sample_assumes() -> None:
+    "Should only look at the samples when they agree."
+    value = [1] * 1000 + ['x'] + [1] * 1000
+    assert kind.xrruns(value, sample=4).runs == ((int, 2001), )
+    assert kind.xrruns(value).runs == ((int, 1000), (str, 1), (int, 1000))
@@ -1,18 +1,31 @@
 # yapf
 
+import asyncio
+import itertools
+import pickle
+
 import pytest
 
-from typing import Any, Iterable, Mapping
+from typing import (Any, Callable, Iterable, List, Mapping, Protocol,
+                    Sequence, Tuple, runtime_checkable)
+from abc import ABC
+from collections.abc import Sized
 
 from hypothesis import given
 from hypothesis import settings
+from hypothesis import strategies as st
 
 from kingston.testing import fixture
 from kingston.decl import unbox
+from kingston.xxx_kind import Runs
 
 from kingston.match import (match, match_subtype, matches, move, Matcher,
                             TypeMatcher, ValueMatcher, Miss, Mismatch,
-                            Conflict)
+                            Conflict, Ambiguous, type_case, invoker, fits,
+                            batch, AsyncTypeMatcher, AsyncValueMatcher,
+                            StructMatcher, freeze, Keywords, Range, Prefix,
+                            Suffix, Glob, BytesMatcher, At, subclass_since,
+                            PatternTrie, automaton, pure, value_case)
 
 from kingston.match import (matches, match, move, Matcher, TypeMatcher,
                             ValueMatcher, Miss, Mismatch, Conflict)
@@ -363,3 +376,1293 @@ def test_ValueMatcher_docstrings(doctest) -> None:
     "Should "
     res = doctest()
     assert res == '', res
+
+
+@fixture.params("cand",
+    (int, ), (str, ), (int, str), (int, float), (int, int, int),
+    (float, float, str), (int, int, int, int), (str, str, int),
+    (ASupertype, ), (Unrelated, ), (tuple, ), ([int], ),
+)  # yapf: disable
+def test_index_lookup_same_as_matches(tmatch: TypeMatcher, cand) -> None:
+    "Should find the same pattern via the index as via a linear scan."
+    assert tmatch.lookup(cand) == matches(cand, tuple(tmatch))
+
+
+def test_index_lookup_keeps_registration_order() -> None:
+    "Should prefer a wildcard pattern registered before an exact one."
+    early = TypeMatcher({(int, Any): lambda a, b: 'any', (int, str): same})
+    late = TypeMatcher({(int, str): same, (int, Any): lambda a, b: 'any'})
+    assert early.lookup((int, str)) == (int, Any)
+    assert late.lookup((int, str)) == (int, str)
+
+
+class A:
+    pass
+
+
+class B(A):
+    pass
+
+
+def test_wildcards_ranked_by_specificity() -> None:
+    "Should pick the most specific pattern whether types are exact or not."
+    early = TypeMatcher({
+        (A, Any): lambda a, b: 'A, Any',
+        (A, int): lambda a, b: 'A, int',
+    })
+    late = TypeMatcher(reversed(early.items()))
+    for matcher in (early, late, early.compile(), late.compile()):
+        assert matcher(A(), 1) == matcher(B(), 1) == 'A, int'
+        assert matcher(A(), 'x') == matcher(B(), 'x') == 'A, Any'
+    assert TypeMatcher({
+        (A, Any): lambda a, b: 'A, Any',
+        (Any, int): lambda a, b: 'Any, int',
+    })(A(), 1) == 'A, Any'
+
+
+def test_index_skips_trie_after_early_exact() -> None:
+    "Should only walk the trie if a wildcard pattern could still win."
+    matcher = ValueMatcher({(1, 2): same, (Any, 2): lambda a, b: 'any'})
+    matcher(3, 2)
+    trie, walked = matcher._index.trie, []
+    trie.lookup = lambda sig: walked.append(sig) or PatternTrie.lookup(
+        trie, sig)
+    assert matcher(1, 2) == (1, 2) and matcher(5, 2) == 'any'
+    assert walked == [(5, 2)]
+
+
+def test_index_invalidated_on_change(tmatch: TypeMatcher) -> None:
+    "Should recompile the index when cases are added or removed."
+    with pytest.raises(Mismatch):
+        tmatch(1.0, 2)
+    tmatch[(float, int)] = lambda x, n: 'new'
+    assert tmatch(1.0, 2) == 'new'
+    del tmatch[(float, int)]
+    with pytest.raises(Mismatch):
+        tmatch(1.0, 2)
+
+
+def test_signature_cache_counts(tmatch: TypeMatcher) -> None:
+    "Should resolve a call signature once and remember it."
+    tmatch(1), tmatch(2), tmatch('x')
+    hits, misses, maxsize, currsize = tmatch.cache_info()
+    assert (hits, misses, currsize) == (1, 2, 2)
+
+
+def test_signature_cache_remembers_miss(tmatch: TypeMatcher) -> None:
+    "Should cache signatures that resolve to `Miss` too."
+    for _ in range(2):
+        with pytest.raises(Mismatch):
+            tmatch(Unrelated())
+    assert tmatch.cache_info().hits == 1
+    assert tmatch.resolve((Unrelated, )) is Miss
+
+
+def test_signature_cache_invalidation(tmatch: TypeMatcher) -> None:
+    "Should forget cached signatures when cases are added or removed."
+    with pytest.raises(Mismatch):
+        tmatch(Unrelated())
+
+    @tmatch.case
+    def unrelated(x: Unrelated):
+        return 'unrelated'
+
+    assert tmatch(Unrelated()) == 'unrelated'
+    del tmatch[Unrelated]
+    with pytest.raises(Mismatch):
+        tmatch(Unrelated())
+
+    @tmatch.missed
+    def default(*args):
+        return 'default'
+
+    assert tmatch(Unrelated()) == 'default'
+
+
+def test_signature_cache_bounded() -> None:
+    "Should evict the least recently used signature."
+    matcher = TypeMatcher({Any: same})
+    matcher.cache_size = 2
+    matcher(1), matcher('x'), matcher(1.0), matcher(1)
+    assert matcher.cache_info() == (0, 4, 2, 2)
+
+
+class Describer(TypeMatcher):
+    "A subclassed matcher declaring its cases as methods."
+
+    def __init__(self, *args, prefix='', **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prefix = prefix
+
+    @type_case
+    def one_int(self, one: int) -> str:
+        return f"{self.prefix}int"
+
+    @type_case
+    def one_str(self, one: str) -> str:
+        return f"{self.prefix}str"
+
+
+class SubDescriber(Describer):
+    "Overrides one and adds one case."
+
+    def one_str(self, one: str) -> str:
+        "Plain method, no longer a case."
+
+    @type_case
+    def one_float(self, one: float) -> str:
+        return f"{self.prefix}float"
+
+
+def test_cases_collected_per_class() -> None:
+    "Should collect decorated cases once, when the class is created."
+    assert Describer.__cases__ == (((int, ), 'one_int'),
+                                   ((str, ), 'one_str'))
+    assert SubDescriber.__cases__ == (((int, ), 'one_int'),
+                                      ((float, ), 'one_float'))
+
+
+def test_cases_bound_per_instance() -> None:
+    "Should bind collected cases to each instance."
+    first, second = Describer(prefix='1:'), SubDescriber(prefix='2:')
+    assert (first(1), first('x')) == ('1:int', '1:str')
+    assert (second(1), second(1.0)) == ('2:int', '2:float')
+    with pytest.raises(Mismatch):
+        second('x')
+
+
+def test_copied_matcher_rebinds_cases() -> None:
+    "Should bind cases to the copy, not to the original instance."
+    import copy
+    original = Describer({bool: lambda b: 'bool'})
+    duplicate = copy.copy(original)
+    assert duplicate[(int, )].__self__ is duplicate
+    assert duplicate(True) == 'bool'
+
+
+@fixture.params("handler, args, kwargs, expected",
+    (lambda: 'none',        (1, 2), {},       'none'),
+    (lambda a, b: a + b,    (1, 2), {},       3),
+    (lambda a, b: a + b,    ((1, 2), ), {},   3),
+    (lambda a, **kw: kw,    (1, ), {'x': 1},  {'x': 1}),
+    (max,                   (1, 2), {},       2),
+)  # yapf: disable
+def test_invoker(handler, args, kwargs, expected) -> None:
+    "Should build call adapters that spread arguments like `callsign()`."
+    assert invoker(handler)(args, kwargs) == expected
+
+
+def test_dispatch_without_introspection(tmatch: TypeMatcher,
+                                        vmatch: ValueMatcher,
+                                        monkeypatch) -> None:
+    "Should not inspect handler signatures when dispatching."
+    import inspect
+
+    def signature(*args, **kwargs):
+        raise AssertionError("signature inspected")
+
+    monkeypatch.setattr(inspect, 'signature', signature)
+    assert tmatch(1) == 5
+    assert vmatch('a0') == 'a0'
+    assert vmatch(0, 1, 1, x=1) == 3
+
+
+@fixture.params("cand",
+    'x', 'a', ('x', 'y'), 'a0', (1, 2, 3), (1, '+', 2), (0, 1, 1, Mapping),
+    (10, 20, 30, 100), (10, 20, 30, 200), (), [1, 2, 3],
+)  # yapf: disable
+def test_vmatch_lookup_same_as_matches(vmatch: ValueMatcher, cand) -> None:
+    "Should find the same pattern via the index as via a linear scan."
+    assert vmatch.lookup(cand) == matches(cand, tuple(vmatch))
+
+
+def test_vmatch_literals_hashed() -> None:
+    "Should look up literal patterns by hash, normalising unhashables."
+    opcodes = ValueMatcher({(n, (n, )): (lambda n, m: n) for n in range(400)})
+    opcodes[(Any, 'x')] = lambda n, x: x
+    opcodes(1, (1, ))
+    assert len(opcodes._index.exact) == 400
+    assert opcodes(399, [399]) == 399
+    assert opcodes(399, 'x') == 'x'
+
+
+@pytest.fixture
+def overlapping() -> ValueMatcher:
+    "Wildcard patterns that overlap each other in different ways."
+    return ValueMatcher({
+        (Any, '+', Any): lambda a, op, b: a + b,
+        (1, Any, Any): lambda a, op, b: 'one first',
+        (Any, '-', Any): lambda a, op, b: a - b,
+        (Any, Any, 0): lambda a, op, b: 'zero last',
+        (Any, '-', 0): lambda a, op, b: 'never reached',
+        (Any, Any): lambda a, b: 'pair',
+    })
+
+
+@fixture.params("cand, expected",
+    ((2, '+', 3), 5),
+    ((1, '+', 3), 4),
+    ((1, '-', 3), 'one first'),
+    ((5, '-', 3), 2),
+    ((5, '-', 0), 5),
+    ((5, '*', 0), 'zero last'),
+    ((5, '*'), 'pair'),
+    (([5], '*'), 'pair'),
+    ((5, '*', 1), Mismatch),
+)  # yapf: disable
+def test_trie_first_registered_wins(overlapping, cand, expected) -> None:
+    "Should pick the same pattern as a linear scan would."
+    assert overlapping.lookup(cand) == matches(cand, tuple(overlapping))
+    if expected is Mismatch:
+        with pytest.raises(Mismatch):
+            overlapping(*cand)
+    else:
+        assert overlapping(*cand) == expected
+
+
+def test_trie_states_reused(overlapping) -> None:
+    "Should build each automaton state once and reuse it."
+    overlapping(2, '+', 3)
+    states = len(overlapping._index.trie.states)
+    overlapping(7, '+', 9)
+    assert len(overlapping._index.trie.states) == states
+
+
+def stepwise_fits(values, pattern) -> bool:
+    "Reference implementation of `fits()` in terms of `move()`."
+    matched, pending = unbox(values), unbox(pattern)
+    matched = matched if isinstance(matched, tuple) else (matched, )
+    pending = pending if isinstance(pending, tuple) else (pending, )
+    while matched or pending:
+        matched, pending = move(matched, pending)
+        if matched is Miss:
+            return False
+    return True
+
+
+def backtracking_fits(values, pattern) -> bool:
+    "Brute force reference for `fits()`: `...` is one or more values."
+    if not pattern:
+        return not values
+    head, rest = pattern[0], pattern[1:]
+    if head is ...:
+        return any(
+            backtracking_fits(values[at:], rest)
+            for at in range(1, len(values) + 1))
+    return (bool(values) and (head is Any or values[0] == head)
+            and backtracking_fits(values[1:], rest))
+
+
+sequences = st.lists(st.sampled_from((1, 2, 3)), max_size=8).map(tuple)
+patterns = st.lists(st.sampled_from((1, 2, Any, ...)), max_size=5).map(tuple)
+
+
+@pytest.mark.slow
+@given(sequences, patterns)
+def test_fits_backtracks(values, pattern) -> None:
+    "Should fit exactly what a backtracking matcher would fit."
+    assert fits(values, pattern) == backtracking_fits(values, pattern)
+
+
+@pytest.mark.slow
+@given(sequences, patterns)
+def test_fits_everything_move_fits(values, pattern) -> None:
+    "Should fit everything stepping with `move()` fits (and more)."
+    if stepwise_fits(values, pattern):
+        assert fits(values, pattern)
+
+
+@pytest.mark.slow
+@given(sequences, st.lists(patterns, max_size=4))
+def test_index_same_as_matches(values, patterns) -> None:
+    "Should find the same pattern via the index as via a linear scan."
+    matcher = ValueMatcher({pattern: same for pattern in patterns})
+    assert matcher.lookup(values) == matches(values, tuple(matcher))
+
+
+@fixture.params("values, pattern",
+    ((1, 3, 3, 3), (1, ..., 3)),
+    ((1, 2, 3, 3, 5), (1, ..., 3, 5)),
+    ((1, 2, 3, 5, 3, 4), (1, ..., 3, 4)),
+    ((int, int, str, str, int, int), (int, ..., str, ..., int)),
+)  # yapf: disable
+def test_fits_backtracking_known(values, pattern) -> None:
+    "Should fit known values `move()` alone gives up on."
+    assert not stepwise_fits(values, pattern)
+    assert fits(values, pattern)
+    assert ValueMatcher({pattern: same}).lookup(values) == pattern
+
+
+def test_fits_long_variadic() -> None:
+    "Should match long signatures against variadic patterns."
+    values = tuple(range(100000))
+    assert fits(values, (0, ...))
+    assert fits(values, (0, ..., 99999))
+    assert not fits(values, (1, ...))
+    assert matches(values, ((1, ...), (0, ..., 99998, 99999))) == (
+        0, ..., 99998, 99999)
+
+
+def test_fits_reuses_transitions() -> None:
+    "Should step over values with transitions built once."
+    compiled = automaton((int, ..., str, ..., int))
+    assert compiled.accepts((int, int, str, int, int), match_subtype)
+    ahead = compiled.step(compiled.start, int, match_subtype)
+    assert compiled.step(compiled.start, bool, match_subtype) is ahead
+    assert compiled.step(ahead, str, match_subtype) is compiled.step(
+        ahead, str, match_subtype) != ahead
+
+
+@pytest.fixture
+def long_calls() -> TypeMatcher:
+    "A type matcher for long argument lists."
+    matcher = TypeMatcher({
+        (int, ...): lambda *ns: 'ints',
+        (str, ..., int, ...): lambda *xs: 'str, then int',
+        (float, ) * 100: lambda *fs: 'a hundred floats',
+    })
+    matcher.compact_above = 10
+    return matcher
+
+
+@fixture.params("args, expected",
+    (tuple(range(1000)), 'ints'),
+    ((True, ) * 1000, 'ints'),
+    (('x', ) * 500 + (1, ) + ('y', ) * 500, 'str, then int'),
+    ((1.0, ) * 100, 'a hundred floats'),
+    ((1.0, ) * 101, Mismatch),
+    (('x', ) * 1000, Mismatch),
+)  # yapf: disable
+def test_compact_signatures(long_calls: TypeMatcher, args, expected) -> None:
+    "Should dispatch long calls on run-length encoded signatures."
+    assert isinstance(long_calls.callsign(args, {}), Runs)
+    for compact_above in (10, 10000):
+        long_calls.compact_above = compact_above
+        if expected is Mismatch:
+            with pytest.raises(Mismatch):
+                long_calls(*args)
+        else:
+            assert long_calls(*args) == expected
+
+
+def test_compact_signatures_sampled(long_calls: TypeMatcher) -> None:
+    "Should only describe samples of long calls when told to."
+    long_calls.sample = 8
+    assert long_calls.callsign(tuple(range(10**6)), {}).runs == ((int,
+                                                                 10**6), )
+
+
+class ASubSubtype(ASubtype):
+    "A subclass two steps down from ASupertype."
+
+
+@pytest.mark.parametrize("reverse", (False, True))
+def test_most_specific_subtype(reverse) -> None:
+    "Should pick the closest supertype, whatever the registration order."
+    cases = [
+        (object, lambda x: 'object'),
+        (ASupertype, lambda x: 'super'),
+        (ASubtype, lambda x: 'sub'),
+        ((ASupertype, ASupertype), lambda x, y: 'super, super'),
+        ((ASubtype, Any), lambda x, y: 'sub, any'),
+        ((ASupertype, ...), lambda *xs: 'super, ...'),
+    ]
+    matcher = TypeMatcher(reversed(cases) if reverse else cases)
+    assert matcher(ASubSubtype()) == 'sub'
+    assert matcher(AnotherSubtype()) == 'super'
+    assert matcher(Unrelated()) == 'object'
+    assert matcher(AnotherSubtype(), ASubtype()) == 'super, super'
+    assert matcher(ASubSubtype(), 1) == 'sub, any'
+    assert matcher(ASubtype(), 1, 2) == 'super, ...'
+
+
+def test_most_specific_before_missed() -> None:
+    "Should try subtypes before falling back on the `Miss` handler."
+    matcher = TypeMatcher({ASupertype: lambda x: 'super', Miss: lambda x: 0})
+    assert matcher(ASubtype()) == 'super'
+    assert matcher(Unrelated()) == 0
+
+
+def test_ambiguous_case() -> None:
+    "Should refuse cases that overlap without being more specific."
+    matcher = TypeMatcher({(ASupertype, ASubtype): lambda x, y: 'left'})
+
+    with pytest.raises(Ambiguous):
+
+        @matcher.case
+        def right(x: ASubtype, y: ASupertype):
+            return 'right'
+
+    @matcher.case
+    def both(x: ASubtype, y: ASubtype):
+        return 'both'
+
+    @matcher.case
+    def unrelated(x: ASubtype, y: Unrelated):
+        return 'unrelated'
+
+    assert matcher(ASubSubtype(), ASubSubtype()) == 'both'
+
+
+class Mixed(ASubtype, Unrelated):
+    "A subclass of two unrelated classes."
+
+
+@pytest.fixture
+def adaptive() -> TypeMatcher:
+    matcher = TypeMatcher({
+        int: lambda x: 'int',
+        str: lambda x: 'str',
+        ASubtype: lambda x: 'sub',
+        Unrelated: lambda x: 'unrelated',
+        ASupertype: lambda x: 'super',
+        (int, Any): lambda x, y: 'int, any',
+        (int, float): lambda x, y: 'int, float',
+    })
+    matcher.cache_size = 0
+    matcher.adaptive, matcher.adapt_every = True, 2
+    return matcher
+
+
+def test_adaptive_reorders_disjoint(adaptive: TypeMatcher) -> None:
+    "Should only reorder patterns that can't overlap, hottest first."
+    for _ in range(4):
+        assert adaptive(True) == 'int'
+        assert adaptive(ASubSubtype()) == 'sub'
+    assert adaptive._solos() == [int, str, Unrelated]
+
+    class Derived(Unrelated):
+        pass
+
+    for _ in range(6):
+        assert adaptive(Derived()) == 'unrelated'
+    assert adaptive._solos() == [Unrelated, int, str]
+
+
+def test_adaptive_counts_cached(adaptive: TypeMatcher) -> None:
+    "Should count hits the signature cache answers too."
+    matcher = TypeMatcher(adaptive)
+    matcher.adaptive, matcher.adapt_every = True, 2
+
+    class Derived(Unrelated):
+        pass
+
+    for _ in range(10):
+        assert matcher(Derived()) == 'unrelated'
+    assert matcher.cache_info().hits == 9
+    assert matcher._hot[Unrelated] == 10
+    assert matcher._solos()[0] is Unrelated
+
+
+def test_adaptive_same_results(adaptive: TypeMatcher) -> None:
+    "Should resolve exactly like the non-adaptive matcher."
+    reference = TypeMatcher(adaptive)
+    calls = [(True, ), ('s', ), (ASubSubtype(), ), (AnotherSubtype(), ),
+             (Mixed(), ), (True, 1.0), (True, 's')]
+    for args in calls * 3:
+        assert adaptive(*args) == reference(*args)
+
+
+def test_instrumented_counts(vmatch: ValueMatcher) -> None:
+    "Should count hits per pattern and misses when instrumented."
+    assert vmatch.stats() == {}
+    vmatch.instrument()
+    vmatch('x'), vmatch('x'), vmatch(1, 2, 3)
+    with pytest.raises(Mismatch):
+        vmatch('nope')
+    stats = vmatch.stats()
+    assert (stats['calls'], stats['misses']) == (4, 1)
+    assert stats['hits'] == {'x': 2, (1, 2, 3): 1}
+    assert set(stats['seconds']) == {'callsign', 'match', 'handler'}
+    assert '(2 hits)' in vmatch.explain()
+    vmatch.instrument(False)
+    vmatch('x')
+    assert vmatch.stats() == {}
+
+
+def test_instrumented_handler_time() -> None:
+    "Should attribute time spent in handlers to them."
+    import time
+    matcher = TypeMatcher({int: lambda n: time.sleep(n / 1000)})
+    matcher.instrument()
+    matcher(10)
+    seconds = matcher.stats()['seconds']
+    assert seconds['handler'] >= 0.01 > seconds['match']
+
+
+def outcome(func: Callable, args: Sequence, kwargs: Mapping) -> Any:
+    try:
+        return func(*args, **kwargs)
+    except Exception as exc:
+        return type(exc)
+
+
+@fixture.params("args, kwargs",
+    (('x', ), {}),
+    ((2, ), {}),
+    ((2, 'x'), {}),
+    ((2, [1]), {}),
+    (([2, 'x'], ), {}),
+    ((2.2, ), {}),
+    ((1.0, 1.1, "={}"), {}),
+    ((1, 2, 3, 4, 5), {}),
+    ((), {'x': 1}),
+    (([1], ), {}),
+    ((True, ), {}),
+    ((ASupertype(), ), {}),
+    ((AnotherSubtype(), ), {}),
+    ((Unrelated(), ), {}),
+    ((print, ), {}),
+    ((1, 2, 3), {}),
+)  # yapf: disable
+def test_compiled_types(tmatch: TypeMatcher, args, kwargs) -> None:
+    "Should dispatch exactly like the matcher it was compiled from."
+    assert outcome(tmatch.compile(), args, kwargs) == outcome(
+        tmatch, args, kwargs)
+
+
+@fixture.params("args, kwargs",
+    (('x', ), {}),
+    (('x', 'y'), {}),
+    ((('x', 'y'), ), {}),
+    (('a0', ), {}),
+    ((1, 2, 3), {}),
+    ((1, '+', 2), {}),
+    ((0, 1, 1), {'x': 1}),
+    ((10, 20, 30, 100), {}),
+    (([1, 2], 3), {}),
+    ((1, ), {}),
+)  # yapf: disable
+def test_compiled_values(vmatch: ValueMatcher, args, kwargs) -> None:
+    "Should dispatch exactly like the matcher it was compiled from."
+    vmatch[(1, '+', 2)] = lambda *args: 'shadowed'
+    assert outcome(vmatch.compile(), args, kwargs) == outcome(
+        vmatch, args, kwargs)
+
+
+def test_compiled_many_types() -> None:
+    "Should look up the types of arities with many cases."
+    matcher = TypeMatcher({(a, b): lambda x, y: (type(x), type(y))
+                           for a in (int, str, float) for b in (int, str)})
+    dispatch = matcher.compile()
+    assert '.get((t0, t1, ))' in matcher.dispatch_source({})
+    assert dispatch(1.0, 'a') == (float, str)
+    with pytest.raises(Mismatch):
+        dispatch(1.0, 1.0)
+
+
+def expressions() -> TypeMatcher:
+    "An expression evaluator, nesting matchers."
+    return TypeMatcher({
+        int: lambda x: x,
+        (list, ): lambda x: 'list',
+        (Any, str, Any): ValueMatcher({
+            (Any, '+', Any): lambda a, op, b: a + b,
+            (Any, '-', 0): lambda a, op, b: a,
+            (Any, '-', Any): lambda a, op, b: a - b,
+            Miss: lambda *args: 'no op',
+        }),
+        (int, ...): lambda n, *seq: seq[0:n],
+        (int, int, int): lambda a, b, c: 'never reached',
+        (str, int, Any): TypeMatcher({(str, int, str): lambda *a: 'inner'}),
+        (float, Any, Any): lambda a, b, c: 'float first',
+    })
+
+
+@pytest.fixture
+def nested() -> TypeMatcher:
+    return expressions()
+
+
+@given(
+    st.lists(
+        st.one_of(st.integers(-2, 2), st.sampled_from(['+', '-', '*', 'x']),
+                  st.floats(allow_nan=False), st.lists(st.integers())),
+        max_size=4))
+def test_compiled_nested(args: list) -> None:
+    "Should dispatch nested matchers exactly like calling them."
+    nested = expressions()
+    assert outcome(nested.compile(), args, {}) == outcome(nested, args, {})
+
+
+def test_compiled_inlines_nested(nested: TypeMatcher) -> None:
+    "Should test both levels in one function, updated with either."
+    assert nested.dispatch_source({}).count('hash(args)') == 1
+    dispatch = nested.compile()
+    assert (dispatch(1, '+', 2), dispatch(1, '-', 0)) == (3, 1)
+    assert (dispatch('a', 'b', 'c'), dispatch('a', 1, 'c')) == ('no op',
+                                                                 'inner')
+    nested[(Any, str, Any)][(Any, '*', Any)] = lambda a, op, b: a * b
+    assert dispatch(2, '*', 3) == 6
+
+
+def test_compiled_regenerated(tmatch: TypeMatcher) -> None:
+    "Should reflect changes made to the matcher after compiling."
+    dispatch = tmatch.compile()
+    assert tmatch.compile() is dispatch
+    tmatch[int] = lambda x: 'replaced'
+    tmatch[bool] = lambda x: 'added'
+    assert (dispatch(1), dispatch(True)) == ('replaced', 'added')
+    assert tmatch.compile() is not dispatch
+    del tmatch[bool]
+    assert dispatch(True) == 'replaced'
+    tmatch.instrument()
+    dispatch(1)
+    assert tmatch.stats()['hits'] == {int: 1}
+
+
+def test_map(tmatch: TypeMatcher) -> None:
+    "Should give the same results as calling the matcher for each item."
+    items = [1, 'x', 2.2, (2, 'x'), 3, ASubtype(), 'y', (3, 'x'), 4]
+    assert tmatch.map(items) == [tmatch(item) for item in items]
+    assert tmatch.cache_info().misses == 5  # one per group
+    calls = [(1, 2, 3), (2, 'x'), (1.0, 2.0, '{}'), (1, 2, 3)]
+    assert tmatch.starmap(calls) == [tmatch(*args) for args in calls]
+
+
+def test_map_values(vmatch: ValueMatcher) -> None:
+    "Should group calls by their values."
+    calls = [('x', 'y'), (1, 2, 3), ([1], '+', 2), ('x', 'y')]
+    assert vmatch.starmap(calls) == [vmatch(*args) for args in calls]
+    with pytest.raises(Mismatch):
+        vmatch.map(['x', 'nope'])
+    keys = {vmatch.groupkey(args) for args in [(1, ), (1.0, ), (True, )]}
+    assert len(keys) == 3
+    assert vmatch.groupkey(([1], )) != vmatch.groupkey(([1.0], ))
+
+
+def test_map_batch() -> None:
+    "Should call batch handlers once per group with all its items."
+    batches = []
+
+    @batch
+    def ints(values):
+        batches.append(values)
+        return [value * 2 for value in values]
+
+    matcher = TypeMatcher({int: ints, str: str.upper})
+    assert matcher.map([1, 'a', 2, 'b', 3]) == [2, 'A', 4, 'B', 6]
+    assert batches == [[1, 2, 3]]
+    matcher[int] = batch(lambda values: [])
+    with pytest.raises(ValueError):
+        matcher.map([1])
+
+
+def test_stream() -> None:
+    "Should dispatch lazily, flattening what generator handlers yield."
+    pulled = []
+
+    def source():
+        for n in itertools.count():
+            pulled.append(n)
+            yield n if n % 3 else str(n)
+
+    def twice(n: int):
+        yield n
+        yield n
+
+    matcher = TypeMatcher({int: twice, str: lambda s: f'<{s}>'})
+    stream = matcher.stream(source())
+    assert list(itertools.islice(stream, 5)) == ['<0>', 1, 1, 2, 2]
+    assert pulled == [0, 1, 2]
+    assert next(stream) == '<3>'
+    assert pulled == [0, 1, 2, 3]
+
+
+def test_async_matcher() -> None:
+    "Should await coroutine handlers and pass other results on."
+
+    async def later(x: Any) -> str:
+        await asyncio.sleep(0)
+        return f'later {x}'
+
+    types = AsyncTypeMatcher({int: later, str: lambda s: s})
+    values = AsyncValueMatcher({(1, Any): lambda a, b: later(b)})
+    assert asyncio.run(types(1)) == 'later 1'
+    assert asyncio.run(types('now')) == 'now'
+    assert asyncio.run(types.compile()(1)) == 'later 1'
+    assert asyncio.run(values(1, 2)) == 'later 2'
+    with pytest.raises(Mismatch):
+        asyncio.run(values(2, 2))
+
+
+def test_amap() -> None:
+    "Should dispatch concurrently up to the limit, yielding in order."
+    running, peak = 0, 0
+
+    async def slow(n: int) -> int:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001 * (n % 3))
+        running -= 1
+        return n * 2
+
+    async def source():
+        for n in range(10):
+            yield n
+
+    async def collect(iterable, limit):
+        return [result async for result in matcher.amap(iterable, limit)]
+
+    matcher = AsyncTypeMatcher({int: slow})
+    assert asyncio.run(collect(source(), 3)) == list(range(0, 20, 2))
+    assert peak == 3
+    assert asyncio.run(collect(range(4), 1)) == [0, 2, 4, 6]
+
+
+def square(n: int) -> int:
+    return n * n
+
+
+def missed(*args: Any) -> str:
+    return 'missed'
+
+
+def test_pickled() -> None:
+    "Should pickle matchers with importable handlers, and their settings."
+    matcher = TypeMatcher({int: square, str: str.upper, Miss: missed})
+    matcher.cache_size = 7
+    copied = pickle.loads(pickle.dumps(matcher))
+    assert copied == matcher and copied.cache_size == 7
+    assert next(key for key in copied if key == Miss) is Miss
+    assert (copied(3), copied('a'), copied(1.0)) == (9, 'A', 'missed')
+    described = pickle.loads(pickle.dumps(Describer(prefix='>')))
+    assert described(1) == '>int'
+
+
+def test_pmap() -> None:
+    "Should dispatch in worker processes, keeping the order of results."
+    matcher = TypeMatcher({int: square, str: str.upper, Miss: missed})
+    items = [1, 'a', 2, 3.0] * 25
+    assert matcher.pmap(items, workers=2, chunksize=7) == matcher.map(items)
+    with pytest.raises(TypeError):
+        TypeMatcher({int: lambda n: n}).pmap([1])
+
+
+@pytest.fixture
+def router() -> StructMatcher:
+    "A structural matcher routing events."
+    router = StructMatcher({
+        'ping': lambda event: 'pong',
+        ((int, int), ...): lambda event: 'points',
+    })
+
+    @router.case({'type': 'order', 'items': [(str, int), ...]})
+    def order(event):
+        return sum(count for _, count in event['items'])
+
+    @router.case({'type': 'order', 'user': {'id': int}})
+    def user_order(event):
+        return event['user']['id']
+
+    @router.case({'type': str})
+    def other(event):
+        return event['type']
+
+    @router.missed
+    def missed(event):
+        return 'missed'
+
+    return router
+
+
+@fixture.params("subject, expected",
+    ('ping', 'pong'),
+    ([(1, 2), [3, 4]], 'points'),
+    ([], 'points'),
+    ([(1, 2), (3, 'x')], 'missed'),
+    ({'type': 'order', 'items': [['a', 1], ('b', 2)]}, 3),
+    ({'type': 'order', 'items': []}, 0),
+    ({'type': 'order', 'items': [['a', 1, 2]], 'user': {'id': 7}}, 7),
+    ({'type': 'order', 'items': 'xy'}, 'order'),
+    ({'type': 1}, 'missed'),
+    ({'kind': 'order'}, 'missed'),
+)  # yapf: disable
+def test_struct_matcher(router: StructMatcher, subject, expected) -> None:
+    "Should match nested structures, first added case first."
+    assert router(subject) == expected
+
+
+def test_struct_matcher_patterns(router: StructMatcher) -> None:
+    "Should refuse duplicate and malformed patterns."
+    with pytest.raises(Conflict):
+        router.case({'type': str})(lambda event: None)
+    with pytest.raises(ValueError):
+        StructMatcher({(..., int): same})('x')
+    assert freeze([{'a': [1]}]) in StructMatcher([([{'a': (1, )}], same)])
+    assert router.map(['ping', {'type': 'x'}]) == ['pong', 'x']
+    pair = StructMatcher({freeze({'a': int, 'b': str}): same})
+    with pytest.raises(Conflict):
+        pair.case({'b': str, 'a': int})(same)
+    assert freeze({1: int, 'a': str}) == freeze({'a': str, 1: int})
+
+
+def test_struct_matcher_map_types() -> None:
+    "Should not group values that are equal but of different types."
+    numbers = StructMatcher({int: lambda n: 'int', float: lambda n: 'float'})
+    assert numbers.map([1, 1.0, True]) == ['int', 'float', 'int']
+
+
+@pytest.fixture
+def requests() -> TypeMatcher:
+    "Type matcher dispatching on keyword arguments."
+    return TypeMatcher({
+        (str, Keywords(page=int)): lambda path, page: f'{path} #{page}',
+        (str, Keywords(page=str)): lambda path, page: f'{path} named {page}',
+        (str, Keywords(page=int, size=Any)):
+            lambda path, **kw: f'{path} #{kw["page"]}/{kw["size"]}',
+        (Any, ..., Keywords(verbose=bool)): lambda *a, verbose: 'verbose',
+        Miss: lambda path, **kw: f'missed {sorted(kw)}',
+    })
+
+
+@fixture.params("args, kwargs, expected",
+    (('home', ), {'page': 2},               'home #2'),
+    (('home', ), {'page': 'x'},             'home named x'),
+    (('home', ), {'page': True},            'home #True'),
+    (('home', ), {'page': 1, 'size': None}, 'home #1/None'),
+    ((1, 2, 3),   {'verbose': False},        'verbose'),
+    (('home', ), {'verbose': 1},            "missed ['verbose']"),
+    (('home', ), {'page': 1.0},             "missed ['page']"),
+    (('home', ), {'size': 1},               "missed ['size']"),
+)  # yapf: disable
+def test_keyword_patterns(requests: TypeMatcher, args, kwargs,
+                          expected) -> None:
+    "Should dispatch on keyword names and types."
+    assert requests(*args, **kwargs) == expected
+
+
+def test_keyword_values() -> None:
+    "Should dispatch on keyword values in value matchers."
+    matcher = ValueMatcher({
+        ('get', Keywords(cached=True)): lambda op, cached: 'cache',
+        ('get', Keywords(cached=Any)): lambda op, cached: 'fetch',
+    })
+    assert matcher('get', cached=True) == 'cache'
+    assert matcher('get', cached=0) == 'fetch'
+    with pytest.raises(Mismatch):
+        matcher('put', cached=True)
+    copied = pickle.loads(pickle.dumps(Keywords(cached=True)))
+    assert copied == Keywords(cached=True) and copied.names == {'cached'}
+
+
+@pytest.fixture
+def statuses() -> ValueMatcher:
+    "Value matcher dispatching on overlapping ranges."
+    return ValueMatcher({
+        Range(200, 299): lambda code: 'success',
+        404: lambda code: 'not found',
+        Range(400, 499): lambda code: 'client error',
+        Range(100, 599): lambda code: 'other',
+        (Range(0, 1.5), 'ms'): lambda value, unit: 'fast',
+        (Range(1.5, None), 'ms'): lambda value, unit: 'slow',
+        Miss: lambda *args: 'missed',
+    })
+
+
+@fixture.params("args, expected",
+    ((200, ),        'success'),
+    ((299.5, ),      'other'),
+    ((404, ),        'not found'),
+    ((400, ),        'client error'),
+    ((100, ),        'other'),
+    ((600, ),        'missed'),
+    (('x', ),        'missed'),
+    ((float('nan'), ), 'missed'),
+    ((1.5, 'ms'),    'fast'),
+    ((1e9, 'ms'),    'slow'),
+    ((-1, 'ms'),     'missed'),
+)  # yapf: disable
+def test_range_patterns(statuses: ValueMatcher, args, expected) -> None:
+    "Should dispatch on intervals, first registered first."
+    assert statuses(*args) == expected
+    assert statuses.compile()(*args) == expected
+
+
+@given(st.lists(st.tuples(st.integers(-20, 20), st.integers(0, 10)),
+                max_size=12),
+       st.integers(-30, 30))
+def test_range_index(ranges, value) -> None:
+    "Should find the same range as trying them in order."
+    patterns = [Range(lo, lo + span) for lo, span in ranges]
+    matcher = ValueMatcher({pattern: same for pattern in patterns})
+    expected = next((pattern for pattern in patterns if pattern(value)),
+                    Miss)
+    assert matcher.resolve(value) == expected
+
+
+@pytest.fixture
+def topics() -> ValueMatcher:
+    "Value matcher routing topic names."
+    return ValueMatcher({
+        'orders.audit': lambda topic: 'audit',
+        Prefix('orders.'): lambda topic: 'orders',
+        Prefix('orders.eu.'): lambda topic: 'eu orders',
+        Suffix('.json'): lambda topic: 'json',
+        Glob('users.*.created'): lambda topic: 'user created',
+        Glob('users.*'): lambda topic: 'users',
+        (Prefix(b'\x01'), Any): lambda frame, size: 'frame',
+        Miss: lambda *args: 'missed',
+    })
+
+
+@fixture.params("args, expected",
+    (('orders.audit', ),    'audit'),
+    (('orders.us.1', ),     'orders'),
+    (('orders.eu.1', ),     'eu orders'),
+    (('orders.eu.json', ),  'eu orders'),
+    (('stock.json', ),      'json'),
+    (('users.1.created', ), 'user created'),
+    (('users.1.deleted', ), 'users'),
+    (('orders', ),          'missed'),
+    ((b'orders.1', ),       'missed'),
+    ((1, ),                 'missed'),
+    ((b'\x01\x02', 2),      'frame'),
+    (('\x01\x02', 2),       'missed'),
+)  # yapf: disable
+def test_string_patterns(topics: ValueMatcher, args, expected) -> None:
+    "Should dispatch on the longest prefix or suffix, or first glob."
+    assert topics(*args) == expected
+    assert topics.compile()(*args) == expected
+
+
+@given(st.lists(st.text('ab', max_size=4), max_size=8), st.text('ab'))
+def test_prefix_index(affixes, value) -> None:
+    "Should find the longest prefix of a value."
+    matcher = ValueMatcher({Prefix(affix): same for affix in affixes})
+    expected = max((affix for affix in affixes if value.startswith(affix)),
+                   key=len,
+                   default=None)
+    found = matcher.resolve(value)
+    assert (None if found is Miss else found.affix) == expected
+
+
+@fixture.params("args, expected",
+    (('abc', 1),   'a'),
+    (('abc', 2),   'ab'),
+    (('abc', 3),   '*'),
+    (('abc', 4),   'a*'),
+    (('xyz', 4),   Mismatch),
+    (('abc', ...), 'ab, any'),
+    (('ab', 5),    'ab, any'),
+    (('b', 2),     Mismatch),
+)  # yapf: disable
+def test_string_patterns_positions(args, expected) -> None:
+    "Should follow every fitting string pattern, ranking them after."
+    matcher = ValueMatcher({
+        (Glob('*'), 3): lambda *args: '*',
+        (Glob('a*'), 4): lambda *args: 'a*',
+        (Prefix('a'), 1): lambda *args: 'a',
+        (Prefix('ab'), 2): lambda *args: 'ab',
+        (Prefix('a'), Any): lambda *args: 'a, any',
+        (Prefix('ab'), Any): lambda *args: 'ab, any',
+    })
+    for dispatch in (matcher, matcher.compile()):
+        if expected is Mismatch:
+            with pytest.raises(Mismatch):
+                dispatch(*args)
+        else:
+            assert dispatch(*args) == expected
+
+
+class CountedGlob(Glob):
+    "Glob counting how often it is tried on its own."
+    __slots__ = ()
+    calls = 0
+
+    def __call__(self, value: Any) -> bool:
+        CountedGlob.calls += 1
+        return super().__call__(value)
+
+
+def test_glob_index_final() -> None:
+    "Should only try globs one by one if patterns continue after them."
+    CountedGlob.calls = 0
+    final = ValueMatcher({
+        CountedGlob('a*'): lambda s: 'a',
+        CountedGlob('*'): lambda s: 'any',
+    })
+    assert [final('abc'), final('xyz')] == ['a', 'any']
+    assert CountedGlob.calls == 0
+    final[(CountedGlob('*'), 1)] = lambda s, n: 'any, 1'
+    final[(CountedGlob('a*'), 2)] = lambda s, n: 'a, 2'
+    assert [final('abc', 1), final('abc', 2)] == ['any, 1', 'a, 2']
+    assert CountedGlob.calls > 0
+
+
+def test_string_patterns_pickled() -> None:
+    "Should copy string patterns."
+    for pattern in (Prefix('a'), Suffix(b'b'), Glob('c*')):
+        assert pickle.loads(pickle.dumps(pattern)) == pattern
+    assert Prefix('a') != Suffix('a')
+    with pytest.raises(TypeError):
+        Prefix(1)
+
+
+@pytest.fixture
+def frames() -> BytesMatcher:
+    "Bytes matcher for a made up binary protocol."
+    matcher = BytesMatcher({
+        At(0, b'\x01'): lambda view: 'ping',
+        (At(0, b'\x02'), At(1, b'\x80', mask=b'\xc0')): lambda view: 'urgent',
+        At(0, b'\x02'): lambda view: 'data',
+        At(2, b'\xff\xff'): lambda view: 'broadcast',
+        Miss: lambda view: 'missed',
+    })
+
+    @matcher.case(At(0, b'\x03'), At(3, b'\x01', mask=b'\x01'))
+    def odd(view: memoryview, sender: str) -> str:
+        return f'odd from {sender}'
+
+    return matcher
+
+
+@fixture.params("args, expected",
+    ((b'\x01', ),                      'ping'),
+    ((bytearray(b'\x02\x81'), ),      'urgent'),
+    ((memoryview(b'\x02\xc1'), ),     'data'),
+    ((b'\x02', ),                      'data'),
+    ((b'\x00\x00\xff\xff', ),       'broadcast'),
+    ((b'\x02\x00\xff\xff', ),       'data'),
+    ((b'\x00\x00\xff', ),            'missed'),
+    ((b'', ),                           'missed'),
+    ((b'\x03\x00\x00\x03', 'a'),    'odd from a'),
+    ((b'\x03\x00\x00\x02', ),       'missed'),
+    (('text', ),                        'missed'),
+    ((5, ),                             'missed'),
+)  # yapf: disable
+def test_bytes_matcher(frames: BytesMatcher, args, expected) -> None:
+    "Should dispatch on bytes at offsets, first registered first."
+    assert frames(*args) == expected
+
+
+def test_bytes_matcher_views() -> None:
+    "Should hand handlers views of frames, without copying them."
+    frame = bytearray(b'\x01\x02\x03\x04')
+    matcher = BytesMatcher({At(0, b'\x01'): lambda view: view})
+    view = matcher(frame)
+    assert isinstance(view, memoryview) and view.obj is frame
+    view[3] = 0
+    assert frame == b'\x01\x02\x03\x00'
+    assert matcher(memoryview(frame)[:2]).tolist() == [1, 2]
+    with pytest.raises(Mismatch):
+        matcher('\x01')
+    with pytest.raises(Mismatch):
+        matcher()
+    matcher[Miss] = lambda *args: args
+    assert matcher() == () and matcher(5, 6) == (5, 6)
+    with pytest.raises(TypeError):
+        matcher[1] = same
+    with pytest.raises(ValueError):
+        At(0, b'\x01', mask=b'')
+    copied = pickle.loads(pickle.dumps(
+        BytesMatcher({At(1, b'\x02', b'\x0f'): missed})))
+    assert list(copied) == [At(1, b'\x02', b'\x0f')]
+
+
+@runtime_checkable
+class Closing(Protocol):
+    def close(self) -> None:
+        ...
+
+
+class Resource:
+    def close(self) -> None:
+        pass
+
+
+class Counted(ABC):
+    "ABC counting its subclass checks."
+    checks = 0
+
+    @classmethod
+    def __subclasshook__(cls, other: type) -> bool:
+        cls.checks += 1
+        return hasattr(other, 'close')
+
+
+@pytest.fixture
+def abstract() -> TypeMatcher:
+    "Type matcher dispatching on ABCs, protocols and generics."
+    matcher = TypeMatcher({Miss: lambda *args: 'missed'})
+    matcher.update({
+        (List[int], str): lambda *args: 'ints',
+        (Sequence[Any], str): lambda *args: 'sequence',
+        (Tuple[int, str], str): lambda *args: 'pair',
+        (Closing, str): lambda *args: 'closing',
+        (Sized, str): lambda *args: 'sized',
+        (Mapping, ): lambda **kwargs: 'keywords',
+    })
+    return matcher
+
+
+@fixture.params("args, kwargs, expected",
+    (([1, 2], 'x'),                {},        'ints'),
+    (([True] * 1000, 'x'),         {},        'ints'),
+    ((['a', 1], 'x'),              {},        'sequence'),
+    (((1, 'a'), 'x'),              {},        'pair'),
+    (((1, 2), 'x'),                {},        'sequence'),
+    ((Resource(), 'x'),            {},        'closing'),
+    (('abc', 'x'),                 {},        'sized'),
+    ((1, 'x'),                     {},        'missed'),
+    ((),                           {'a': 1},  'keywords'),
+)  # yapf: disable
+def test_abstract_patterns(abstract: TypeMatcher, args, kwargs,
+                           expected) -> None:
+    "Should dispatch on ABCs, protocols and generics, most specific first."
+    assert abstract(*args, **kwargs) == expected
+
+
+def test_abstract_verdicts() -> None:
+    "Should check a class against an ABC once, and refuse unknowable types."
+    matcher = TypeMatcher({Counted: lambda x: 'counted'})
+    matcher.cache_size = 0
+    before = subclass_since.cache_info()
+    assert [matcher(Resource()) for _ in range(3)] == ['counted'] * 3
+    assert subclass_since.cache_info().hits - before.hits >= 2
+    assert Counted.checks == 1 and list(matcher) == [Counted]
+    with pytest.raises(TypeError):
+
+        @matcher.case
+        def _(x: Mapping[str, int]) -> None:
+            pass
+
+    class Unchecked(Protocol):
+        def close(self) -> None:
+            ...
+
+    with pytest.raises(TypeError):
+
+        @matcher.case
+        def _(x: Unchecked) -> None:
+            pass
+
+
+def test_abstract_registrations() -> None:
+    "Should see classes registered with an ABC after dispatching on it."
+    class Plugin(ABC):
+        pass
+
+    class Thing:
+        pass
+
+    matcher = TypeMatcher({Plugin: lambda x: 'plugin', Miss: missed})
+    assert not match_subtype(Thing, Plugin)
+    assert matcher(Thing()) == 'missed'
+    Plugin.register(Thing)
+    assert match_subtype(Thing, Plugin)
+    assert matcher(Thing()) == 'plugin'
+
+
+class Calls(list):
+    "Records the arguments of calls to ``handler``."
+    def handler(self, *args: Any) -> Tuple:
+        self.append(args)
+        return args
+
+
+def test_pure_cases() -> None:
+    "Should remember results of pure handlers, per case."
+    calls = Calls()
+    matcher = ValueMatcher({
+        (1, Any): pure(calls.handler, maxsize=2),
+        Miss: lambda *args: 'missed',
+    })
+    matcher.case(2)(pure(lambda n: [n]))
+    results = [matcher(*args) for args in ((1, 'a'), (1, 'b'), (1, 'a'),
+                                           (1, 'c'), (1, 'b'), (1, True),
+                                           (1, 1), (3, 3))]
+    assert results[:3] == [(1, 'a'), (1, 'b'), (1, 'a')]
+    assert results[-1] == 'missed'
+    assert calls == [(1, 'a'), (1, 'b'), (1, 'c'), (1, 'b'), (1, True),
+                     (1, 1)]
+    assert matcher.memo_info()[(1, Any)] == (1, 6, 2, 2)
+    assert matcher(2) is matcher(2) == [2]
+    assert matcher.memo_info()[2].hits == 1
+    matcher[(1, Any)] = calls.handler
+    assert list(matcher.memo_info()) == [2]
+    assert matcher.memo_info()[2].currsize == 0
+    with pytest.raises(ValueError):
+        pure(maxsize=0)(same)
+
+
+def test_pure_decorators() -> None:
+    "Should mark handlers declared with ``case()`` as pure."
+    calls = Calls()
+
+    class Doubling(TypeMatcher):
+        @type_case(pure=True, maxsize=1)
+        def _int(self, n: int) -> int:
+            calls.append(n)
+            return n * 2
+
+    class Halving(ValueMatcher):
+        @value_case(Any, pure=True)
+        def _any(self, n: Any) -> Any:
+            calls.append(n)
+            return n / 2
+
+    doubling, halving = Doubling(), Halving()
+
+    @doubling.case(pure=True)
+    def _str(s: str) -> str:
+        calls.append(s)
+        return s * 2
+
+    assert [doubling(1), doubling(1), doubling(2), doubling(1)] == [2, 2, 4, 2]
+    assert [doubling('a'), doubling('a'), halving(2), halving(2)] == [
+        'aa', 'aa', 1, 1
+    ]
+    assert calls == [1, 2, 1, 'a', 2]
+
+
+def test_pure_per_matcher() -> None:
+    "Should remember results per matcher and by the types inside values."
+    calls = Calls()
+    generic = TypeMatcher({
+        (List[float], str): pure(lambda *args: 'floats'),
+        (List[int], str): pure(lambda *args: 'ints'),
+    })
+    assert [generic([1], 'x'), generic([1.0], 'x')] == ['ints', 'floats']
+    assert generic([1], 'x') == 'ints'
+
+    remembering = ValueMatcher({Any: pure(calls.handler)})
+    plain = ValueMatcher({Any: calls.handler})
+    remembering(1), remembering(1), plain(1), plain(1)
+    assert calls == [(1, ), (1, ), (1, )]
+    assert not hasattr(calls.handler, '__pure__') and not plain.memo_info()
+
+
+
+def test_pure_skips_dispatch() -> None:
+    "Should remember results above dispatch, on every way of calling."
+    calls = Calls()
+    matcher = ValueMatcher({Any: pure(calls.handler)})
+    resolved = Calls()
+    resolve = matcher.resolve
+    matcher.resolve = lambda cand: resolve(resolved.handler(cand)[0])
+    assert matcher(1) == matcher(1) == (1, )
+    assert len(resolved) == 1
+    assert matcher.map([2, 2, 2, 2]) == [(2, )] * 4
+    assert matcher.memo_info()[Any].hits == 4
+    compiled = matcher.compile()
+    assert compiled(5) == compiled(5) == (5, )
+    matcher.instrument()
+    assert matcher(6) == matcher(6) == (6, )
+    assert matcher.map([6, 7]) == [(6, ), (7, )]
+    assert calls == [(1, ), (2, ), (5, ), (6, ), (7, )]
+
+
+def test_range_kinds() -> None:
+    "Should index ranges with ends of different kinds separately."
+    matcher = ValueMatcher({
+        Range(1, 5): lambda x: 'number',
+        Range('a', 'z'): lambda x: 'letter',
+        Range(None, None): lambda x: 'anything',
+    })
+    assert [matcher(3), matcher(2.5), matcher('b'), matcher(b'b')] == [
+        'number', 'number', 'letter', 'anything'
+    ]
+    with pytest.raises(ValueError):
+        Range(1, 'z')
@@ -1,7 +1,9 @@
 import inspect
+import itertools
 from inspect import Parameter
 
-from typing import Any, Collection, Union, Tuple, Callable, Mapping, Type
+from typing import (Any, Collection, Union, Tuple, Callable, Mapping, Type,
+                    Sequence, Optional)
 
 from kingston.decl import params  # type: ignore  ## XXX but why ???
 from kingston.decl import LISTLIKE, box, unbox, Singular
@@ -27,12 +29,22 @@ def uniform(template: Collection, sibling: Collection) -> Collection:
             f"kingston.kind.uniform(): ran out of options for {sibling!r}")
 
 
+def typingtype(x: Any) -> bool:
+    """Checks if `x` is one of the objects of the `typing` module, e.g.
+    `typing.Mapping` or `typing.List[int]`.
+
+    >>> typingtype(Mapping), typingtype(Mapping[str, int]), typingtype(dict)
+    (True, True, False)
+    """
+    return getattr(x, '__module__', None) == 'typing'
+
+
 def safetype(x: Any) -> Type:
     """Safer than `type(x)` due to a special rule: instances of `x` that
     are taken from the `typing` module is returned as-is.
 
     """
-    return x if str(x).startswith('typing.') else type(x)  # XXX ugly check
+    return x if typingtype(x) else type(x)
 
 
 def xrtype(x: Any) -> Union[type, Collection[type]]:
@@ -51,8 +63,10 @@ def xrtype(x: Any) -> Union[type, Collection[type]]:
     >>> xrtype(Mapping)
     typing.Mapping
     """
+    if typingtype(x):
+        return x
     name = x.__name__ if hasattr(x, '__name__') else None
-    type_ = name if name else safetype(x)
+    type_ = name if name else type(x)
     arity = len(x) if type_ in LISTLIKE else 0
 
     if arity == 0:
@@ -61,6 +75,68 @@ def xrtype(x: Any) -> Union[type, Collection[type]]:
         return safetype(x)(xrtype(el) for el in x)
 
 
+class Runs:
+    """Run-length encoded type description of a sequence, i.e. what
+    ``xrtype()`` would give but as ``(type, count)`` pairs in
+    ``runs``. ``container`` is the type of the described sequence.
+
+    >>> Runs(tuple, ((int, 2), (str, 1))).expand()
+    (<class 'int'>, <class 'int'>, <class 'str'>)
+    """
+    __slots__ = ('container', 'runs', 'length')
+
+    def __init__(self, container: Type, runs: Tuple[Tuple[Any, int],
+                                                    ...]) -> None:
+        self.container, self.runs = container, runs
+        self.length = sum(count for _, count in runs)
+
+    def expand(self) -> Collection:
+        return self.container(
+            itertools.chain.from_iterable(
+                itertools.repeat(type_, count) for type_, count in self.runs))
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __eq__(self, other: Any) -> bool:
+        return (type(other) is Runs and self.container is other.container
+                and self.runs == other.runs)
+
+    def __hash__(self) -> int:
+        return hash((Runs, self.container, self.runs))
+
+    def __repr__(self) -> str:
+        runs = ', '.join(f"{typenick(type_)}×{count}"
+                         for type_, count in self.runs)
+        return f"<Runs {self.container.__name__}: {runs}>"
+
+
+def xrruns(x: Sequence, sample: Optional[int] = None) -> Runs:
+    """
+    Run-length encoded variant of `xrtype()` for sequences.
+
+    >>> xrruns((1, 2, 3, 'x'))
+    <Runs tuple: int×3, str×1>
+
+    With ``sample``, only that many evenly spread elements are
+    described at first. If they all have the same type, it is
+    *assumed* to be the type of every element:
+
+    >>> xrruns([1] * 1000000, sample=8)
+    <Runs list: int×1000000>
+    """
+    size = len(x)
+    if sample and size > sample > 1:
+        step = (size - 1) / (sample - 1)
+        first, *rest = (xrtype(x[round(n * step)]) for n in range(sample))
+        if all(other == first for other in rest):
+            return Runs(type(x), ((first, size), ))
+
+    return Runs(type(x),
+                tuple((type_, sum(1 for _ in group))
+                      for type_, group in itertools.groupby(map(xrtype, x))))
+
+
 def nick(x: Any) -> str:
     """Safely get a short 'nickname' from parameter `x`. If `x == None` returns
     `'None'`
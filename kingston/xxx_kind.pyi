@@ -1,5 +1,5 @@
 import collections.abc
-from typing import Any, Collection, Iterable, List, Tuple, Union
+from typing import Any, Collection, Iterable, List, Optional, Sequence, Tuple, Union
 
 Mutable = Union[list, set, dict]
 Immutable = Union[tuple, str, bytes, list, int, bool, float]
@@ -11,6 +11,15 @@ class FrozenDict(collections.abc.Mapping):
     def __getitem__(self, key: Any) -> Any: ...
     def __hash__(self) -> Any: ...
 
+class Runs:
+    container: type
+    runs: Tuple[Tuple[Any, int], ...]
+    length: int
+    def __init__(self, container: type, runs: Tuple[Tuple[Any, int], ...]) -> None: ...
+    def expand(self) -> Collection: ...
+    def __len__(self) -> int: ...
+
+def xrruns(x: Sequence, sample: Optional[int] = ...) -> Runs: ...
 def fromiter(objs: Iterable[Any]) -> List[type]: ...
 def nick(x: Any) -> str: ...
 def xrtype(arg: Any) -> Union[type, Tuple[type]]: ...